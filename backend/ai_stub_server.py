@@ -0,0 +1,217 @@
+"""
+Local stand-in for the upstream AI/media APIs, for load tests and offline dev.
+
+    python ai_stub_server.py --port 8900 --latency-ms 300 --jitter-ms 100 --error-rate 0.02
+
+Then start the API against it:
+
+    OPENROUTER_BASE_URL=http://127.0.0.1:8900/v1 \\
+    UNSPLASH_API_URL=http://127.0.0.1:8900 \\
+    FAL_QUEUE_URL=http://127.0.0.1:8900/fal/fal-ai/minimax-video \\
+    OPENROUTER_API_KEY=stub FAL_API_KEY=stub \\
+    uvicorn app.main:app
+
+Imitates:
+  POST /v1/chat/completions      OpenAI chat completions, incl. stream=True and JSON mode
+  GET  /photos/random            Unsplash random photo
+  POST /fal/{app}                fal.ai queue submit
+  GET  /fal/{app}/requests/{id}/status, /fal/{app}/requests/{id}
+
+Latency is drawn per request; streams additionally wait --token-ms per token.
+--error-rate returns a 500 (or 429 for --rate-limit-rate) before any work is done.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+config = {
+    "latency_ms": 200.0,
+    "jitter_ms": 50.0,
+    "token_ms": 15.0,
+    "reply_tokens": 120,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "video_seconds": 10.0,
+    "video_fail_rate": 0.0,
+}
+
+app = FastAPI(title="AI upstream stub")
+_video_jobs = {}
+_counters = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+WORDS = ("model data vector neural gradient tensor python learning token layer "
+         "attention training dataset feature loss optimizer batch inference").split()
+
+
+async def _latency():
+    delay = random.gauss(config["latency_ms"], config["jitter_ms"]) if config["jitter_ms"] else config["latency_ms"]
+    await asyncio.sleep(max(0.0, delay) / 1000)
+
+
+def _injected_error():
+    """Return an error response for this request, or None to serve it normally."""
+    _counters["requests"] += 1
+    roll = random.random()
+    if roll < config["rate_limit_rate"]:
+        _counters["rate_limited"] += 1
+        return JSONResponse({"error": {"message": "Rate limit exceeded (stub)", "type": "rate_limit"}}, status_code=429,
+                            headers={"Retry-After": "1"})
+    if roll < config["rate_limit_rate"] + config["error_rate"]:
+        _counters["errors"] += 1
+        return JSONResponse({"error": {"message": "Injected upstream failure (stub)", "type": "server_error"}}, status_code=500)
+    return None
+
+
+def _words(n: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(n))
+
+
+def _json_reply(system_prompt: str) -> str:
+    """Shape JSON-mode output after what the matching AIService prompt asks for."""
+    if "'question'" in system_prompt:
+        questions = []
+        for i in range(5):
+            options = [f"Option {c} {_words(2)}" for c in "ABCD"]
+            questions.append({"question": f"Question {i + 1}: {_words(8)}?", "options": options, "answer": options[0]})
+        return json.dumps({"quiz": questions})
+    if "'title'" in system_prompt:
+        body = "\n\n".join(f"## {_words(3).title()}\n\n- {_words(20)}\n- {_words(20)}" for _ in range(4))
+        return json.dumps({
+            "title": _words(5).title(),
+            "content": body,
+            "seo_title": _words(6).title(),
+            "seo_description": _words(20),
+        })
+    return json.dumps({"result": _words(20)})
+
+
+def _reply(body: dict) -> str:
+    messages = body.get("messages") or [{}]
+    system_prompt = messages[0].get("content", "") if messages[0].get("role") == "system" else ""
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return _json_reply(system_prompt)
+    if "search keywords" in system_prompt:
+        return _words(4)
+    return _words(config["reply_tokens"])
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    error = _injected_error()
+    if error is not None:
+        return error
+    body = await request.json()
+    await _latency()
+    reply = _reply(body)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    model = body.get("model", "stub-model")
+    prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages", []))
+    completion_tokens = len(reply) // 4
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    async def events():
+        def chunk(delta: dict, finish_reason=None) -> str:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(reply.split(" ")):
+            await asyncio.sleep(config["token_ms"] / 1000)
+            yield chunk({"content": word if i == 0 else " " + word})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/photos/random")
+async def unsplash_random(query: str = ""):
+    error = _injected_error()
+    if error is not None:
+        return error
+    await _latency()
+    photo_id = uuid.uuid4().hex[:12]
+    return {
+        "id": photo_id,
+        "alt_description": query,
+        "urls": {
+            "regular": f"https://picsum.photos/seed/{photo_id}/1080/720",
+            "small": f"https://picsum.photos/seed/{photo_id}/400/267",
+        },
+    }
+
+
+@app.post("/fal/{fal_app:path}")
+async def fal_submit(fal_app: str, request: Request):
+    error = _injected_error()
+    if error is not None:
+        return error
+    await _latency()
+    request_id = uuid.uuid4().hex
+    # (submitted at, whether the job will end FAILED)
+    _video_jobs[request_id] = (time.monotonic(), random.random() < config["video_fail_rate"])
+    base = f"{str(request.base_url).rstrip('/')}/fal/{fal_app}/requests/{request_id}"
+    return {"request_id": request_id, "status_url": f"{base}/status", "response_url": base}
+
+
+@app.get("/fal/{fal_app:path}/requests/{request_id}/status")
+async def fal_status(fal_app: str, request_id: str):
+    job = _video_jobs.get(request_id)
+    if job is None:
+        return JSONResponse({"detail": "Not found"}, status_code=404)
+    submitted, fails = job
+    elapsed = time.monotonic() - submitted
+    if elapsed >= config["video_seconds"]:
+        return {"status": "FAILED" if fails else "COMPLETED", "request_id": request_id}
+    if elapsed < config["video_seconds"] / 3:
+        return JSONResponse({"status": "IN_QUEUE", "queue_position": 1, "request_id": request_id}, status_code=202)
+    return JSONResponse({"status": "IN_PROGRESS", "request_id": request_id}, status_code=202)
+
+
+@app.get("/fal/{fal_app:path}/requests/{request_id}")
+async def fal_result(fal_app: str, request_id: str):
+    if request_id not in _video_jobs:
+        return JSONResponse({"detail": "Not found"}, status_code=404)
+    return {"video": {"url": f"https://stub.invalid/videos/{request_id}.mp4"}}
+
+
+@app.get("/stats")
+async def stub_stats():
+    return {**_counters, "config": config}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI/Unsplash/fal.ai server for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=config["latency_ms"], help="mean time before a response starts")
+    parser.add_argument("--jitter-ms", type=float, default=config["jitter_ms"], help="std deviation of the latency")
+    parser.add_argument("--token-ms", type=float, default=config["token_ms"], help="delay between streamed tokens")
+    parser.add_argument("--reply-tokens", type=int, default=config["reply_tokens"], help="words in a plain-text reply")
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"], help="fraction of requests that return 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=config["rate_limit_rate"], help="fraction that return 429")
+    parser.add_argument("--video-seconds", type=float, default=config["video_seconds"], help="time until a fal.ai job completes")
+    parser.add_argument("--video-fail-rate", type=float, default=config["video_fail_rate"], help="fraction of fal.ai jobs that end FAILED")
+    args = parser.parse_args()
+    for key in config:
+        config[key] = getattr(args, key)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
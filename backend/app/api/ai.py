@@ -1,27 +1,193 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, AsyncIterator
 from pydantic import BaseModel
-from app.core.ai_service import AIService
+import json
+import time
+from app.core.ai_service import AIService, keyword_cache, image_pool_cache
+from app.core.prompt_cache import prompt_cache
+from app.core.jobs import video_jobs
+from app.core.quiz_batch import quiz_batch
+from app.core.images import chat_images, ImageTooLarge
+from app.models.base_models import VideoJob, ChatHistory, QuizBatchRun, User, UserRole
+from app.api.auth import get_current_user
+from app.core.admission import admission, AdmissionRejected
+from app.core.net import client_ip
+from app.core.conversations import conversation_store
+from app.core.config import settings
+from beanie import PydanticObjectId
+from datetime import datetime
+from contextlib import asynccontextmanager
+from jose import jwt, JWTError
 from app.schemas.blog import BlogGenerate, BlogCreate
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+DEFAULT_MODEL = "google/gemini-2.0-flash-001"
+
+
+# --- Admission control ---
+
+def _caller_key(request: Request) -> str:
+    """Fair-queueing identity: the JWT subject when a valid bearer token is sent, else the client IP (see TRUSTED_PROXIES)."""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(auth[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{client_ip(request)}"
+
+def _too_many_requests(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"AI service busy ({e.reason}). Please retry shortly.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+@asynccontextmanager
+async def _admitted(request: Request, model: str = DEFAULT_MODEL):
+    """Hold an admission slot for the duration of an upstream AI call, or fail with 429."""
+    try:
+        await admission.acquire(_caller_key(request), model)
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        admission.release(model, time.monotonic() - started)
+
+
+# --- Server-Sent Events ---
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _sse_events(request: Request, tokens: AsyncIterator[str]):
+    """
+    Frame model tokens as SSE: one ``token`` event per delta, then a ``done`` event
+    carrying the assembled reply and time-to-first-token. Stops pulling (and closes
+    the upstream completion) as soon as the client goes away.
+    """
+    started = time.perf_counter()
+    ttft_ms = None
+    parts = []
+    try:
+        async for token in tokens:
+            if await request.is_disconnected():
+                print("SSE client disconnected, cancelling upstream completion")
+                return
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+            parts.append(token)
+            yield _sse("token", {"token": token})
+        yield _sse("done", {
+            "response": "".join(parts),
+            "ttft_ms": ttft_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    except Exception as e:
+        yield _sse("error", {"error": f"Error connecting to AI Assistant: {str(e)}"})
+    finally:
+        await tokens.aclose()
+
+class _SSEResponse(StreamingResponse):
+    """
+    StreamingResponse that runs ``on_close`` exactly once however sending ends.
+    A client that disconnects before the first chunk cancels the send before the
+    body generator ever starts, so its ``finally`` cannot be relied on for that.
+    """
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self._on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                await on_close()
+
+async def _sse_response(request: Request, tokens: AsyncIterator[str], model: str = DEFAULT_MODEL, headers: Optional[dict] = None) -> StreamingResponse:
+    """Admit the caller up front, then hold the slot until the stream finishes or the client leaves."""
+    try:
+        await admission.acquire(_caller_key(request), model)
+    except AdmissionRejected as e:
+        await tokens.aclose()
+        raise _too_many_requests(e)
+    started = time.monotonic()
+
+    async def close():
+        # No-op if the body already closed it; otherwise the stream never started
+        await tokens.aclose()
+        admission.release(model, time.monotonic() - started)
+
+    return _SSEResponse(
+        _sse_events(request, tokens),
+        on_close=close,
+        media_type="text/event-stream",
+        headers={**(headers or {}), "Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Server-side conversations ---
+
+async def _open_conversation(body, http_request: Request, kind: str):
+    """
+    Return (conversation, conversation_id, history). Clients that still send their
+    own ``history`` without a ``conversation_id`` stay stateless; everyone else gets
+    a stored conversation. A new one is only written once its first turn is
+    recorded, so rejected or failed requests leave nothing behind.
+    """
+    if body.history and not body.conversation_id:
+        return None, None, body.history
+    if not body.conversation_id:
+        conversation, conversation_id = conversation_store.start(_caller_key(http_request), kind)
+        return conversation, conversation_id, []
+    conversation = await conversation_store.open(body.conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation, body.conversation_id, conversation_store.context(conversation)
+
+async def _record_stream(tokens: AsyncIterator[str], conversation: ChatHistory, message: str):
+    """Pass tokens through and store the turn once the reply has streamed completely."""
+    parts = []
+    try:
+        async for token in tokens:
+            parts.append(token)
+            yield token
+    finally:
+        await tokens.aclose()
+    await conversation_store.record_turn(conversation, message, "".join(parts))
+
+def _conversation_headers(conversation_id: Optional[str]) -> dict:
+    return {"X-Conversation-Id": conversation_id} if conversation_id else {}
+
 
 # --- Request Body Models ---
 
 class TutorRequest(BaseModel):
     message: str
     history: List[dict] = []
+    conversation_id: Optional[str] = None  # token from an earlier reply; omit (with no history) to start one
 
 class AssistantRequest(BaseModel):
     message: str
     history: List[dict] = []
     system_prompt: str = "You are a helpful AI Assistant."
-    image_data: Optional[str] = None  # base64 data URL for image uploads
+    image_data: Optional[str] = None  # base64 data URL; prefer image_id from POST /ai/images
+    image_id: Optional[str] = None
     model: str = "google/gemini-2.0-flash-001"
+    conversation_id: Optional[str] = None  # token from an earlier reply; omit (with no history) to start one
 
 class QuizRequest(BaseModel):
     content: str
+    force_refresh: bool = False  # bypass the prompt-result cache
 
 
 class ImageRequest(BaseModel):
@@ -29,36 +195,73 @@ class ImageRequest(BaseModel):
 
 
 @router.post("/generate-image")
-async def generate_image(request: ImageRequest):
-    try:
-        result = await AIService.generate_image(request.prompt)
-        return {"url": result["url"], "prompt": result["prompt"]}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def generate_image(request: ImageRequest, http_request: Request):
+    async with _admitted(http_request):
+        try:
+            result = await AIService.generate_image(request.prompt)
+            return {"url": result["url"], "prompt": result["prompt"]}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 class VideoRequest(BaseModel):
     prompt: str
 
 
-@router.post("/generate-video")
+class VideoJobOut(BaseModel):
+    job_id: str
+    status: str
+    prompt: str
+    queue_position: Optional[int] = None
+    url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+def _job_out(job: VideoJob) -> VideoJobOut:
+    return VideoJobOut(
+        job_id=str(job.id),
+        status=job.status.value,
+        prompt=job.prompt,
+        queue_position=job.queue_position,
+        url=job.video_url,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+@router.post("/generate-video", response_model=VideoJobOut, status_code=status.HTTP_202_ACCEPTED)
 async def generate_video(request: VideoRequest):
+    """Queue a video generation job and return immediately; poll /ai/jobs/{job_id} for the result."""
+    job = await video_jobs.submit(request.prompt)
+    return _job_out(job)
+
+
+@router.get("/jobs/{job_id}", response_model=VideoJobOut)
+async def get_video_job(job_id: str):
     try:
-        result = await AIService.generate_video(request.prompt)
-        return {"url": result["url"], "prompt": result["prompt"]}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        oid = PydanticObjectId(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    job = await VideoJob.get(oid)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_out(job)
 
 
 @router.post("/generate-blog", response_model=BlogCreate)
-async def generate_blog(request: BlogGenerate):
-    blog_data = await AIService.generate_blog(
-        topic=request.topic,
-        difficulty=request.difficulty,
-        word_count=request.word_count,
-        include_code=request.include_code,
-        include_diagrams=request.include_diagrams
-    )
+async def generate_blog(request: BlogGenerate, http_request: Request):
+    async with _admitted(http_request):
+        blog_data = await AIService.generate_blog(
+            topic=request.topic,
+            difficulty=request.difficulty,
+            word_count=request.word_count,
+            include_code=request.include_code,
+            include_diagrams=request.include_diagrams,
+            force_refresh=request.force_refresh
+        )
 
     return {
         "title": blog_data["title"],
@@ -70,17 +273,159 @@ async def generate_blog(request: BlogGenerate):
         "seo_description": blog_data["seo_description"]
     }
 
+@router.get("/cache/stats")
+async def prompt_cache_stats():
+    """Hit/miss counters for the prompt-result cache and the image generator caches."""
+    return {
+        **prompt_cache.stats(),
+        "image_keywords": keyword_cache.stats(),
+        "image_pools": image_pool_cache.stats(),
+    }
+
+@router.get("/admission/stats")
+async def admission_stats():
+    """Queue depth, in-flight calls, rejections and queue wait percentiles for capacity planning."""
+    return admission.stats()
+
+@router.get("/conversations/{conversation_id}")
+async def get_conversation(conversation_id: str):
+    conversation = await conversation_store.open(conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {
+        "conversation_id": conversation_id,
+        "kind": conversation.kind,
+        "summary": conversation.summary,
+        "summarized_messages": conversation.summarized_messages,
+        "messages": conversation.messages,
+        "updated_at": conversation.updated_at,
+    }
+
+@router.delete("/conversations/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_conversation(conversation_id: str):
+    conversation = await conversation_store.open(conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    await conversation.delete()
+
 @router.post("/tutor")
-async def ai_tutor(request: TutorRequest):
-    response = await AIService.get_tutor_response(request.message, request.history)
-    return {"response": response}
+async def ai_tutor(request: TutorRequest, http_request: Request):
+    conversation, conversation_id, history = await _open_conversation(request, http_request, "tutor")
+    async with _admitted(http_request):
+        try:
+            response = await AIService.get_tutor_response(request.message, history)
+        except Exception as e:
+            # Shown to the user as before, but not stored; a new conversation stays unsaved
+            return {"response": f"Error: {e}", "conversation_id": request.conversation_id}
+    if conversation is not None:
+        await conversation_store.record_turn(conversation, request.message, response)
+    return {"response": response, "conversation_id": conversation_id}
+
+@router.post("/tutor/stream")
+async def ai_tutor_stream(request: TutorRequest, http_request: Request):
+    conversation, conversation_id, history = await _open_conversation(request, http_request, "tutor")
+    tokens = AIService.stream_tutor_response(request.message, history)
+    if conversation is not None:
+        tokens = _record_stream(tokens, conversation, request.message)
+    return await _sse_response(http_request, tokens, headers=_conversation_headers(conversation_id))
 
 @router.post("/generate-quiz")
-async def generate_quiz(request: QuizRequest):
-    quiz = await AIService.generate_quiz(request.content)
+async def generate_quiz(request: QuizRequest, http_request: Request):
+    async with _admitted(http_request):
+        quiz = await AIService.generate_quiz(request.content, force_refresh=request.force_refresh)
     return {"quiz": quiz}
 
+class QuizBatchRunOut(BaseModel):
+    run_id: str
+    status: str
+    force: bool
+    blogs_processed: int
+    blogs_skipped: int
+    blogs_failed: int
+    quizzes_written: int
+    errors: List[dict]
+    error: Optional[str] = None
+    started_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+def _run_out(run: QuizBatchRun) -> QuizBatchRunOut:
+    return QuizBatchRunOut(
+        run_id=str(run.id),
+        status=run.status.value,
+        force=run.force,
+        blogs_processed=run.blogs_processed,
+        blogs_skipped=run.blogs_skipped,
+        blogs_failed=run.blogs_failed,
+        quizzes_written=run.quizzes_written,
+        errors=run.errors,
+        error=run.error,
+        started_at=run.started_at,
+        updated_at=run.updated_at,
+        finished_at=run.finished_at,
+    )
+
+
+@router.post("/quizzes/batch", response_model=QuizBatchRunOut, status_code=status.HTTP_202_ACCEPTED)
+async def start_quiz_batch(force: bool = False, current_user: User = Depends(get_current_user)):
+    """Generate quizzes for every published blog in the background. ``force`` regenerates unchanged posts too."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    run = await quiz_batch.start(force=force)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A quiz batch run is already in progress")
+    return _run_out(run)
+
+@router.get("/quizzes/batch", response_model=QuizBatchRunOut)
+async def quiz_batch_status(current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    run = await quiz_batch.latest()
+    if run is None:
+        raise HTTPException(status_code=404, detail="No quiz batch runs yet")
+    return _run_out(run)
+
+@router.post("/images", status_code=status.HTTP_201_CREATED)
+async def upload_chat_image(file: UploadFile = File(...)):
+    """
+    Upload an image for the assistant once and reference it by ``image_id``.
+    It is downscaled and re-encoded on upload, so chat requests stay small.
+    Images unused for CHAT_IMAGE_RETENTION_SECONDS are swept, after which the
+    id returns 404 and the image has to be uploaded again.
+    """
+    if file.content_type and not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only image uploads are allowed.")
+    try:
+        return await chat_images.save_upload(file)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def _check_image_id(request: AssistantRequest) -> None:
+    if request.image_id and not chat_images.exists(request.image_id):
+        raise HTTPException(status_code=404, detail="Image not found")
+
 @router.post("/assistant")
-async def ai_assistant(request: AssistantRequest):
-    response = await AIService.get_assistant_response(request.message, request.history, request.system_prompt, request.image_data, request.model)
-    return {"response": response}
+async def ai_assistant(request: AssistantRequest, http_request: Request):
+    _check_image_id(request)
+    conversation, conversation_id, history = await _open_conversation(request, http_request, "assistant")
+    async with _admitted(http_request, request.model):
+        try:
+            response = await AIService.get_assistant_response(request.message, history, request.system_prompt, request.image_data, request.model, request.image_id)
+        except Exception as e:
+            # Shown to the user as before, but not stored; a new conversation stays unsaved
+            return {"response": f"Error connecting to AI Assistant: {str(e)}", "conversation_id": request.conversation_id}
+    if conversation is not None:
+        await conversation_store.record_turn(conversation, request.message, response)
+    return {"response": response, "conversation_id": conversation_id}
+
+@router.post("/assistant/stream")
+async def ai_assistant_stream(request: AssistantRequest, http_request: Request):
+    _check_image_id(request)
+    conversation, conversation_id, history = await _open_conversation(request, http_request, "assistant")
+    tokens = AIService.stream_assistant_response(request.message, history, request.system_prompt, request.image_data, request.model, request.image_id)
+    if conversation is not None:
+        tokens = _record_stream(tokens, conversation, request.message)
+    return await _sse_response(http_request, tokens, request.model, headers=_conversation_headers(conversation_id))
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from pydantic import BaseModel, EmailStr
-from app.models.base_models import User, UserDashboard, OTPRecord
+from app.models.base_models import User, UserDashboard
 from app.schemas.user import UserCreate, UserOut, Token
-from app.core.security import create_access_token, verify_password, get_password_hash
-from app.core.email import send_otp_email, generate_otp
-from datetime import datetime, timedelta
+from app.core.security import create_access_token, verify_password_async, get_password_hash_async, needs_rehash
+from app.core.email import send_otp_email
+from app.core.mailer import MailQueueFull
+from app.core.otp import issue_otp, consume_otp, OTPRejected
+from app.core.net import client_ip
+from datetime import timedelta
 from jose import jwt, JWTError
 from app.core.config import settings
+from app.core.auth_cache import principal_cache
+from app.core.images import avatars, ImageTooLarge
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -28,6 +36,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     user = await User.find_one(User.email == username)
     if user is None:
         raise credentials_exception
+    principal_cache.put(token, username, payload.get("exp"), user)
     return user
 
 from app.models.base_models import User, UserDashboard
@@ -40,7 +49,7 @@ async def register(user_in: UserCreate):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User already exists"
         )
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await get_password_hash_async(user_in.password)
     new_user = User(
         name=user_in.name,
         email=user_in.email,
@@ -58,12 +67,17 @@ async def register(user_in: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     user = await User.find_one(User.email == form_data.username)
-    if not user or not verify_password(form_data.password, user.password):
+    if not user or not await verify_password_async(form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if needs_rehash(user.password):
+        # The plaintext is only available now, so upgrade to the current work factor here
+        user.password = await get_password_hash_async(form_data.password)
+        await user.save()
+        principal_cache.invalidate_subject(user.email)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         subject=user.email, expires_delta=access_token_expires
@@ -81,51 +95,40 @@ class OTPVerify(BaseModel):
     otp: str
     purpose: str = "register"
 
-@router.post("/send-otp")
-async def send_otp(body: OTPRequest):
-    """Generate and email a 6-digit OTP. Rate-limited to one per email at a time."""
-    # Delete any existing OTPs for this email+purpose
-    existing = await OTPRecord.find(
-        OTPRecord.email == body.email,
-        OTPRecord.purpose == body.purpose
-    ).to_list()
-    for rec in existing:
-        await rec.delete()
-
-    otp = generate_otp()
-    record = OTPRecord(email=body.email, otp=otp, purpose=body.purpose)
-    await record.insert()
+def _otp_error(e: OTPRejected) -> HTTPException:
+    headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
 
+@router.post("/send-otp")
+async def send_otp(body: OTPRequest, request: Request):
+    """Generate and email a 6-digit OTP. Sends are capped per email and per IP within a sliding window."""
+    try:
+        otp = await issue_otp(body.email, body.purpose, client_ip(request))
+    except OTPRejected as e:
+        raise _otp_error(e)
+
+    # Delivery happens in the background, so SMTP failures no longer surface here.
+    # In dev without SMTP credentials, hand the code back so sign-up still works.
+    import os
+    dev = os.getenv("ENV", "dev") != "production"
     try:
         await send_otp_email(body.email, otp, purpose=body.purpose)
-    except Exception as e:
-        # If email fails, still return success with OTP in dev for testing
-        import os
-        if os.getenv("ENV", "dev") != "production":
+    except MailQueueFull:
+        if dev:
             return {"message": "OTP generated (email unavailable in dev)", "dev_otp": otp}
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
+        raise HTTPException(status_code=503, detail="Email service is busy. Please try again shortly.")
 
+    if dev and not settings.SMTP_USER:
+        return {"message": "OTP sent to your email", "dev_otp": otp}
     return {"message": "OTP sent to your email"}
 
 @router.post("/verify-otp")
 async def verify_otp(body: OTPVerify):
     """Verify the OTP. Returns JWT for login, or a verified flag for registration."""
-    record = await OTPRecord.find_one(
-        OTPRecord.email == body.email,
-        OTPRecord.purpose == body.purpose
-    )
-    if not record:
-        raise HTTPException(status_code=400, detail="No OTP found. Please request a new one.")
-
-    if datetime.utcnow() > record.expires_at:
-        await record.delete()
-        raise HTTPException(status_code=400, detail="OTP has expired. Please request a new one.")
-
-    if record.otp != body.otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP. Please try again.")
-
-    # OTP is valid — delete it
-    await record.delete()
+    try:
+        await consume_otp(body.email, body.purpose, body.otp)
+    except OTPRejected as e:
+        raise _otp_error(e)
 
     if body.purpose == "login":
         user = await User.find_one(User.email == body.email)
@@ -154,7 +157,7 @@ async def oauth_login(user_in: OAuthUserIn):
     if not user:
         # Auto-register OAuth user with a random password (they'll always use OAuth)
         import secrets
-        random_pw = get_password_hash(secrets.token_hex(32))
+        random_pw = await get_password_hash_async(secrets.token_hex(32))
         user = User(
             name=user_in.name,
             email=user_in.email,
@@ -167,6 +170,7 @@ async def oauth_login(user_in: OAuthUserIn):
     elif user_in.avatar and not user.profile_picture:
         user.profile_picture = user_in.avatar
         await user.save()
+        principal_cache.invalidate_subject(user.email)
 
     access_token = create_access_token(
         subject=user.email,
@@ -174,6 +178,11 @@ async def oauth_login(user_in: OAuthUserIn):
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.get("/cache/stats")
+async def auth_cache_stats():
+    """Hit rate of the get_current_user principal cache."""
+    return principal_cache.stats()
+
 @router.get("/me", response_model=UserOut)
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
@@ -188,6 +197,7 @@ async def update_user_me(
     """
     Update the current user's profile.
     """
+    previous_email = current_user.email
     if user_in.name is not None:
         current_user.name = user_in.name
         
@@ -202,13 +212,15 @@ async def update_user_me(
         current_user.email = user_in.email
 
     if user_in.password is not None:
-        current_user.password = get_password_hash(user_in.password)
+        current_user.password = await get_password_hash_async(user_in.password)
 
     await current_user.save()
+    # Drop cached sessions under the old subject too if the email changed
+    principal_cache.invalidate_subject(previous_email)
+    principal_cache.invalidate_subject(current_user.email)
     return current_user
 
 import os
-import uuid
 
 @router.post("/me/avatar", response_model=UserOut)
 async def upload_avatar(
@@ -226,32 +238,20 @@ async def upload_avatar(
             detail="Invalid file type. Only standard images are allowed."
         )
 
-    # Generate a unique filename
-    filename = f"{uuid.uuid4()}{ext}"
-    upload_dir = "uploads/profiles"
-    try:
-        os.makedirs(upload_dir, exist_ok=True)
-    except OSError:
-        upload_dir = "/tmp/uploads/profiles"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-    file_path = os.path.join(upload_dir, filename)
-
-    # Save the file
     try:
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-    except Exception as e:
+        avatar_id = await avatars.save_upload(file)
+    except ImageTooLarge:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save file: {str(e)}"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image is larger than {settings.AVATAR_MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
         )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Update user profile picture path
-    # If it was saved in /tmp, the static mount handles /uploads routing either way
-    current_user.profile_picture = f"/uploads/profiles/{filename}"
+    # Thumbnails live beside it as {id}_{size}.jpg
+    current_user.profile_picture = avatars.url_for(avatar_id)
     await current_user.save()
+    principal_cache.invalidate_subject(current_user.email)
     
     return current_user
 
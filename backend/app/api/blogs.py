@@ -1,41 +1,281 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Optional
-from app.models.base_models import Blog
-from app.schemas.blog import BlogCreate, BlogOut, BlogGenerate
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Union, Literal
+from app.models.base_models import Blog, Quiz, User, UserRole
+from app.api.auth import get_current_user
+from app.schemas.blog import BlogCreate, BlogOut, BlogGenerate, BlogSummary, BlogPage, SearchHit, BlogHTMLOut, PopularBlog, BlogFacetsOut, RelatedBlog
+from app.core.search import search_index
+from app.core.cache import ResponseCache, CachedResponse, cached_response, LISTING_BROTLI_QUALITY, LISTING_GZIP_LEVEL
+from app.core.config import settings
+from app.core.views import view_counter
+from app.core.blog_io import export_ndjson, import_ndjson
+from app.core.facets import blog_facets
+from app.core.related import related_index
+from app.core.feeds import feed_store
+from app.core.render import render_markdown
 from beanie import PydanticObjectId
+from beanie.operators import Or, And
+from pydantic import TypeAdapter
+import base64
+import datetime
 
 router = APIRouter(prefix="/blogs", tags=["blogs"])
 
+MAX_PAGE_SIZE = 100
+MAX_RELATED = 20
+
+# Serialized BlogOut bodies keyed by slug; every write path must call invalidate_blog()
+blog_cache = ResponseCache(settings.BLOG_CACHE_MAX_BYTES)
+# Serialized listing pages keyed by normalized query string; any write clears them all
+list_cache = ResponseCache(settings.BLOG_CACHE_MAX_BYTES // 4)
+
+_BLOG_LIST = TypeAdapter(List[BlogOut])
+_SUMMARY_LIST = TypeAdapter(List[BlogSummary])
+
+def _cache_key(slug: str, format: str) -> str:
+    return slug if format == "markdown" else f"{slug}:{format}"
+
+def invalidate_blog(slug: str):
+    for format in ("markdown", "html"):
+        blog_cache.invalidate(_cache_key(slug, format))
+    list_cache.clear()
+
+def clear_blog_caches():
+    blog_cache.clear()
+    list_cache.clear()
+
+
+def _format_count(n: int) -> str:
+    if n >= 1_000_000:
+        return f"{n / 1_000_000:.1f}M"
+    if n >= 1_000:
+        return f"{n / 1_000:.1f}K"
+    return str(n)
+
+def _encode_cursor(created_at: datetime.datetime, blog_id) -> str:
+    raw = f"{created_at.isoformat()}|{blog_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, blog_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.datetime.fromisoformat(created_at), PydanticObjectId(blog_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def init_blog_indexes():
+    """Build the in-memory blog indexes from MongoDB. Called from the app lifespan and after bulk imports."""
+    search_index.clear()
+    related_index.clear()
+    feed_store.clear()
+    async for blog in Blog.find_all():
+        search_index.add(blog)
+        related_index.add(blog)
+        feed_store.add(blog)
+    await blog_facets.rebuild()
+
 @router.get("/stats")
 async def get_blog_stats():
     total_blogs = await Blog.count()
+    total_views = await Blog.find_all().sum(Blog.views) or 0
+    total_views = int(total_views) + view_counter.pending_total()
+    # Engagement: share of posts that have been read at least once (persisted counts)
+    viewed = await Blog.find(Blog.views > 0).count()
     return {
         "total_blogs": total_blogs,
         "active_users": 1, # Mock for now
-        "blog_views": "1.2K", # Mock for now
-        "engagement": "85%" # Mock for now
+        "blog_views": _format_count(total_views),
+        "total_views": total_views,
+        "engagement": f"{round(100 * viewed / total_blogs) if total_blogs else 0}%",
+        "response_cache": blog_cache.stats(),
     }
 
 @router.post("/", response_model=BlogOut)
 async def create_blog(blog_in: BlogCreate):
     db_blog = Blog(**blog_in.model_dump())
     await db_blog.insert()
+    search_index.add(db_blog)
+    related_index.add(db_blog)
+    blog_facets.add(db_blog)
+    feed_store.add(db_blog)
+    invalidate_blog(db_blog.slug)
     return db_blog
 
-@router.get("/", response_model=List[BlogOut])
-async def list_blogs(category: Optional[str] = None, skip: int = 0, limit: int = 100):
-    query = Blog.find()
-    if category:
-        query = Blog.find(Blog.category == category)
-    blogs = await query.skip(skip).limit(limit).to_list()
-    return blogs
-
-@router.get("/{slug}", response_model=BlogOut)
-async def get_blog(slug: str):
-    blog = await Blog.find_one(Blog.slug == slug)
-    if not blog:
+@router.get("/export")
+async def export_blogs(current_user: User = Depends(get_current_user)):
+    """Stream every blog as NDJSON. Admin only."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return StreamingResponse(
+        export_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="blogs.ndjson"'},
+    )
+
+@router.post("/import")
+async def import_blogs(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Upsert blogs by slug from an NDJSON request body. Admin only.
+
+    The body is consumed as a stream and written in batches; the response reports
+    per-line validation errors alongside inserted/updated counts.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    report = await import_ndjson(request.stream())
+    if report["inserted"] or report["updated"]:
+        clear_blog_caches()
+        await init_blog_indexes()
+    return report
+
+@router.get("/", response_model=Union[BlogPage, List[BlogOut], List[BlogSummary]])
+async def list_blogs(
+    category: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    List blogs.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset pagination over
+    ``(created_at, _id)`` newest-first and returns ``{"items", "next_cursor"}``.
+    ``summary=true`` projects out the Markdown body so only card fields leave MongoDB.
+    Serialized pages and their compressed variants are cached until the next write.
+    """
+    # Only the parameters that shape the page, so unknown query args cannot mint new entries
+    key = f"category={category}&skip={skip}&limit={limit}&cursor={cursor}&summary={summary}"
+    entry = list_cache.get(key)
+    if entry is None:
+        page = await _fetch_blogs(category, skip, limit, cursor, summary)
+        if isinstance(page, BlogPage):
+            body = page.model_dump_json(by_alias=True).encode("utf-8")
+        elif summary:
+            body = _SUMMARY_LIST.dump_json(page, by_alias=True)
+        else:
+            body = _BLOG_LIST.dump_json(page, by_alias=True)
+        entry = list_cache.put(key, await CachedResponse.build(
+            body, brotli_quality=LISTING_BROTLI_QUALITY, gzip_level=LISTING_GZIP_LEVEL,
+        ))
+    return cached_response(entry, if_none_match, accept_encoding)
+
+async def _fetch_blogs(category: Optional[str], skip: int, limit: int, cursor: Optional[str], summary: bool):
+    filters = [Blog.category == category] if category else []
+
+    if cursor is None:
+        query = Blog.find(*filters).skip(skip).limit(limit)
+        if summary:
+            return await query.project(BlogSummary).to_list()
+        return [BlogOut.model_validate(b) for b in await query.to_list()]
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        created_at, last_id = _decode_cursor(cursor)
+        filters.append(Or(
+            Blog.created_at < created_at,
+            And(Blog.created_at == created_at, Blog.id < last_id),
+        ))
+    # Fetch one extra row to learn whether another page exists
+    query = Blog.find(*filters).sort("-created_at", "-_id").limit(limit + 1)
+    if summary:
+        rows = await query.project(BlogSummary).to_list()
+    else:
+        rows = await query.to_list()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    items = rows if summary else [BlogOut.model_validate(b) for b in rows]
+    return BlogPage(items=items, next_cursor=next_cursor)
+
+@router.get("/search", response_model=List[SearchHit])
+async def search_blogs(q: str, limit: int = 10, prefix: bool = True):
+    """Full-text search over title, tags and content, ranked with BM25 from the in-memory index."""
+    return search_index.search(q, limit=max(1, min(limit, MAX_PAGE_SIZE)), prefix=prefix)
+
+@router.get("/facets", response_model=BlogFacetsOut)
+async def get_blog_facets():
+    """Category and tag counts for published posts, served from the materialized summary."""
+    return blog_facets.snapshot()
+
+@router.post("/facets/rebuild", response_model=BlogFacetsOut)
+async def rebuild_blog_facets(current_user: User = Depends(get_current_user)):
+    """Recompute facet counts from MongoDB. Admin only; for repairing drift."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    await blog_facets.rebuild()
+    return blog_facets.snapshot()
+
+@router.get("/popular", response_model=List[PopularBlog])
+async def popular_blogs(limit: int = 10):
+    """Top-N posts by persisted plus not-yet-flushed views."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = await Blog.find_all().sort("-views").limit(limit).project(PopularBlog).to_list()
+    # Unflushed views can lift a post from outside the persisted top N, so rank every
+    # post with pending views too; that set is bounded by one flush interval of traffic
+    seen = {row.slug for row in rows}
+    pending = [slug for slug in view_counter.pending if slug not in seen]
+    if pending:
+        rows += await Blog.find({"slug": {"$in": pending}}).project(PopularBlog).to_list()
+    for row in rows:
+        row.views += view_counter.pending_for(row.slug)
+    rows.sort(key=lambda r: r.views, reverse=True)
+    return rows[:limit]
+
+@router.get("/{slug}", response_model=Union[BlogOut, BlogHTMLOut])
+async def get_blog(
+    slug: str,
+    format: Literal["markdown", "html"] = "markdown",
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Serve a blog from the slug-keyed response cache. A matching If-None-Match
+    short-circuits to 304 without touching MongoDB or Pydantic.
+
+    ``format=html`` returns the HTML and table of contents rendered at write time
+    instead of the raw Markdown body.
+    """
+    key = _cache_key(slug, format)
+    entry = blog_cache.get(key)
+    if entry is None:
+        blog = await Blog.find_one(Blog.slug == slug)
+        if not blog:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        if format == "html":
+            if blog.content_html is None:
+                # Posts written before write-time rendering existed: backfill once. Only the
+                # rendered fields are $set, so a concurrent views $inc is not overwritten
+                rendered = render_markdown(blog.content)
+                await Blog.get_motor_collection().update_one({"_id": blog.id}, {"$set": rendered})
+                for field, value in rendered.items():
+                    setattr(blog, field, value)
+            out = BlogHTMLOut.model_validate(blog)
+        else:
+            out = BlogOut.model_validate(blog)
+        body = out.model_dump_json(by_alias=True).encode("utf-8")
+        entry = blog_cache.put(key, await CachedResponse.build(body))
+
+    view_counter.hit(slug)
+    return cached_response(entry, if_none_match, accept_encoding)
+
+@router.get("/{slug}/related", response_model=List[RelatedBlog])
+async def related_blogs(slug: str, k: int = 5):
+    """Top-k posts by TF-IDF cosine similarity, cached per slug until the corpus changes."""
+    results = related_index.related(slug, max(1, min(k, MAX_RELATED)))
+    if results is None:
         raise HTTPException(status_code=404, detail="Blog not found")
-    return blog
+    return results
+
+@router.get("/{slug}/quizzes", response_model=List[Quiz])
+async def blog_quizzes(slug: str):
+    """Quizzes generated from this post by the batch pipeline, one per content chunk."""
+    return await Quiz.find(Quiz.blog_slug == slug).sort("chunk").to_list()
 
 @router.delete("/{blog_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_blog(blog_id: str):
@@ -47,6 +287,12 @@ async def delete_blog(blog_id: str):
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     await blog.delete()
+    search_index.remove(str(oid))
+    related_index.remove(blog.slug)
+    blog_facets.remove(blog)
+    feed_store.remove(blog.slug)
+    invalidate_blog(blog.slug)
+    await Quiz.find(Quiz.blog_id == str(oid)).delete()
 
 
 @router.post("/generate", response_model=BlogCreate)
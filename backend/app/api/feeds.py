@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Header, Response, status
+from typing import Optional
+from app.core.cache import cached_response
+from app.core.feeds import feed_store
+
+router = APIRouter(tags=["feeds"])
+
+async def _serve(name: str, if_none_match: Optional[str], if_modified_since: Optional[str], accept_encoding: Optional[str]):
+    headers = feed_store.headers()
+    if not if_none_match and feed_store.not_modified_since(if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return cached_response(await feed_store.get(name), if_none_match, accept_encoding, headers)
+
+@router.get("/sitemap.xml")
+async def sitemap(
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    return await _serve("sitemap", if_none_match, if_modified_since, accept_encoding)
+
+@router.get("/rss.xml")
+async def rss_feed(
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    return await _serve("rss", if_none_match, if_modified_since, accept_encoding)
+
+@router.get("/atom.xml")
+async def atom_feed(
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    return await _serve("atom", if_none_match, if_modified_since, accept_encoding)
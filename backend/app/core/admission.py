@@ -0,0 +1,246 @@
+import asyncio
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+
+MAX_TRACKED_USERS = 10_000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("model", "future", "enqueued_at")
+
+    def __init__(self, model: str):
+        self.model = model
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+def _percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)]
+
+
+class AdmissionController:
+    """
+    Gatekeeper in front of upstream AI calls.
+
+    - Per-user token buckets reject bursts immediately with a Retry-After.
+    - Global and per-model concurrency limits cap in-flight upstream calls.
+    - Callers that cannot start right away wait in a bounded queue. Freed slots
+      are handed out round-robin across users, so one heavy user cannot starve
+      the rest, and a waiter past its deadline is rejected instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        model_concurrency: int,
+        model_limits: Dict[str, int],
+        max_queue: int,
+        queue_timeout: float,
+        user_rate_per_minute: float,
+        user_burst: int,
+    ):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency
+        self.model_limits = model_limits
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.user_rate = user_rate_per_minute / 60.0
+        self.user_burst = user_burst
+
+        self.in_flight = 0
+        self.in_flight_by_model: Counter = Counter()
+        self.waiters: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.queue_depth = 0
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+        self.admitted = 0
+        self.rejected: Counter = Counter()
+        self.wait_times: Deque[float] = deque(maxlen=1000)
+        self.service_times: Deque[float] = deque(maxlen=1000)
+
+    # --- per-user rate limiting ---
+
+    def _take_token(self, user: str) -> Optional[float]:
+        """Consume one token; return seconds until one is available if the bucket is empty."""
+        now = time.monotonic()
+        bucket = self._buckets.get(user)
+        if bucket is None:
+            bucket = [float(self.user_burst), now]
+        tokens = min(self.user_burst, bucket[0] + (now - bucket[1]) * self.user_rate)
+        bucket[1] = now
+        self._buckets[user] = bucket
+        self._buckets.move_to_end(user)
+        while len(self._buckets) > MAX_TRACKED_USERS:
+            self._buckets.popitem(last=False)
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return (1.0 - tokens) / self.user_rate if self.user_rate else float(self.queue_timeout)
+        bucket[0] = tokens - 1.0
+        return None
+
+    # --- concurrency slots ---
+
+    def _has_capacity(self, model: str) -> bool:
+        limit = self.model_limits.get(model, self.model_concurrency)
+        return self.in_flight < self.max_concurrency and self.in_flight_by_model[model] < limit
+
+    def _grant(self, model: str) -> None:
+        self.in_flight += 1
+        self.in_flight_by_model[model] += 1
+        self.admitted += 1
+
+    def _estimate_retry_after(self) -> int:
+        avg = sum(self.service_times) / len(self.service_times) if self.service_times else 1.0
+        return max(1, math.ceil(avg * (self.queue_depth + 1) / self.max_concurrency))
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(reason, max(1, math.ceil(retry_after)))
+
+    async def acquire(self, user: str, model: str, rate_limited: bool = True) -> None:
+        """
+        Take a slot for ``model`` or raise AdmissionRejected. ``rate_limited=False``
+        skips the per-user token bucket, for background work that paces itself but
+        should still share the concurrency limits and the fair queue.
+        """
+        wait_for_token = self._take_token(user) if rate_limited else None
+        if wait_for_token is not None:
+            raise self._reject("rate_limited", wait_for_token)
+
+        # No barging: while anyone is queued, newcomers queue behind them
+        if self.queue_depth == 0 and self._has_capacity(model):
+            self._grant(model)
+            self.wait_times.append(0.0)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            raise self._reject("queue_full", self._estimate_retry_after())
+
+        waiter = _Waiter(model)
+        self.waiters.setdefault(user, deque()).append(waiter)
+        self.queue_depth += 1
+        # Another model may have spare capacity even though the queue is non-empty
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._drop_waiter(user, waiter)
+                raise self._reject("queue_timeout", self._estimate_retry_after())
+        except asyncio.CancelledError:
+            if waiter.future.done():
+                # Slot was granted just as the caller went away: hand it straight back
+                self.release(model, 0.0)
+            else:
+                self._drop_waiter(user, waiter)
+            raise
+        self.wait_times.append(time.monotonic() - waiter.enqueued_at)
+
+    def _drop_waiter(self, user: str, waiter: _Waiter) -> None:
+        queue = self.waiters.get(user)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.queue_depth -= 1
+            if not queue:
+                del self.waiters[user]
+        waiter.future.cancel()
+
+    def release(self, model: str, service_time: float) -> None:
+        self.in_flight -= 1
+        self.in_flight_by_model[model] -= 1
+        if self.in_flight_by_model[model] <= 0:
+            del self.in_flight_by_model[model]
+        if service_time:
+            self.service_times.append(service_time)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting users in round-robin order."""
+        progressed = True
+        while progressed and self.waiters and self.in_flight < self.max_concurrency:
+            progressed = False
+            for user in list(self.waiters):
+                queue = self.waiters[user]
+                head = queue[0]
+                if not self._has_capacity(head.model):
+                    continue
+                queue.popleft()
+                self.queue_depth -= 1
+                # Rotate the user to the back so others get the next slot
+                del self.waiters[user]
+                if queue:
+                    self.waiters[user] = queue
+                self._grant(head.model)
+                head.future.set_result(True)
+                progressed = True
+                break
+
+    @asynccontextmanager
+    async def slot(self, user: str, model: str, rate_limited: bool = True):
+        await self.acquire(user, model, rate_limited)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(model, time.monotonic() - started)
+
+    def stats(self) -> dict:
+        waits_ms = [w * 1000 for w in self.wait_times]
+        return {
+            "in_flight": self.in_flight,
+            "in_flight_by_model": dict(self.in_flight_by_model),
+            "queue_depth": self.queue_depth,
+            "waiting_users": len(self.waiters),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "wait_ms": {
+                "p50": round(_percentile(waits_ms, 50), 1),
+                "p95": round(_percentile(waits_ms, 95), 1),
+                "p99": round(_percentile(waits_ms, 99), 1),
+            },
+            "limits": {
+                "max_concurrency": self.max_concurrency,
+                "model_concurrency": self.model_concurrency,
+                "model_limits": self.model_limits,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "user_rate_per_minute": round(self.user_rate * 60, 2),
+                "user_burst": self.user_burst,
+            },
+        }
+
+
+def _parse_model_limits(raw: str) -> Dict[str, int]:
+    """Parse "model=limit,model=limit" overrides for the per-model concurrency cap."""
+    limits = {}
+    for part in raw.split(","):
+        model, _, limit = part.strip().rpartition("=")
+        if model and limit.isdigit():
+            limits[model] = int(limit)
+    return limits
+
+
+admission = AdmissionController(
+    max_concurrency=settings.AI_MAX_CONCURRENCY,
+    model_concurrency=settings.AI_MODEL_CONCURRENCY,
+    model_limits=_parse_model_limits(settings.AI_MODEL_LIMITS),
+    max_queue=settings.AI_QUEUE_MAX,
+    queue_timeout=settings.AI_QUEUE_TIMEOUT_SECONDS,
+    user_rate_per_minute=settings.AI_USER_RATE_PER_MINUTE,
+    user_burst=settings.AI_USER_BURST,
+)
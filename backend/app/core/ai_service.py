@@ -2,19 +2,101 @@ from openai import AsyncOpenAI
 import json
 import asyncio
 import urllib.parse
-import httpx
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.prompt_cache import prompt_cache, prompt_key
+from app.core.cache import TTLCache
+from app.core.images import chat_images
+from app.core.search import tokenize
+
+# generate_image caches: normalized prompt -> keywords, normalized keywords -> image URL pool
+keyword_cache = TTLCache(settings.IMAGE_CACHE_MAX_ENTRIES, settings.IMAGE_KEYWORD_TTL_SECONDS)
+image_pool_cache = TTLCache(settings.IMAGE_CACHE_MAX_ENTRIES, settings.IMAGE_POOL_TTL_SECONDS)
+
+
+def _normalize_image_text(text: str) -> str:
+    """Order- and stopword-insensitive key so light rephrasings share a cache entry."""
+    tokens = sorted(set(tokenize(text)))
+    return " ".join(tokens) if tokens else text.strip().lower()
+
+# Model used to fold old chat turns into a conversation summary
+SUMMARY_MODEL = "google/gemini-2.0-flash-001"
+# Model behind generate_quiz, and so behind the quiz batch pipeline
+QUIZ_MODEL = "google/gemini-2.0-flash-001"
 
 client = AsyncOpenAI(
     api_key=settings.OPENROUTER_API_KEY,
-    base_url="https://openrouter.ai/api/v1",
+    base_url=settings.OPENROUTER_BASE_URL,
     timeout=60.0,
     max_retries=2
 )
 
 class AIService:
     @staticmethod
-    async def generate_blog(topic: str, difficulty: str, word_count: int, include_code: bool, include_diagrams: bool = False):
+    async def _cached_completion(model: str, system_prompt: str, prompt: str, response_format: dict = None, force_refresh: bool = False, parse=None):
+        """
+        Single-turn completion served from the prompt cache when an identical request was answered before.
+
+        ``parse`` turns the raw text into the result and raises if it is unusable. A
+        completion is only cached when the model finished normally and ``parse``
+        accepted it, so a truncated or malformed answer is never replayed.
+        """
+        parse = parse or (lambda text: text)
+        key = prompt_key(model, system_prompt, prompt, response_format)
+        if not force_refresh:
+            cached = await prompt_cache.get(key)
+            if cached is not None:
+                try:
+                    return parse(cached)
+                except Exception:
+                    # Stored before validation existed; ask the model again
+                    pass
+
+        kwargs = {"response_format": response_format} if response_format else {}
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            **kwargs
+        )
+        choice = response.choices[0]
+        content = choice.message.content
+        result = parse(content)
+        if choice.finish_reason == "stop":
+            total_tokens = response.usage.total_tokens if response.usage else 0
+            await prompt_cache.put(key, model, content, total_tokens)
+        return result
+
+    @staticmethod
+    def _parse_blog(content: str) -> dict:
+        parsed = json.loads(content)
+        # Handle cases where the model returns a list instead of a dict
+        if isinstance(parsed, list) and len(parsed) > 0:
+            parsed = parsed[0]
+        # Handle cases where the model nests the content under a "blog" key
+        if isinstance(parsed, dict) and "blog" in parsed:
+            parsed = parsed["blog"]
+        if not isinstance(parsed, dict) or not parsed.get("title") or not parsed.get("content"):
+            raise ValueError("Model returned no title or content")
+        return parsed
+
+    @staticmethod
+    def _parse_quiz(raw: str) -> list:
+        parsed = json.loads(raw)
+        if isinstance(parsed, dict):
+            first_key = list(parsed.keys())[0]
+            parsed = parsed[first_key] if isinstance(parsed[first_key], list) else [parsed]
+        if not isinstance(parsed, list) or not parsed:
+            raise ValueError("Model returned no questions")
+        for item in parsed:
+            if not isinstance(item, dict) or not item.get("question") or not isinstance(item.get("options"), list) or "answer" not in item:
+                raise ValueError("Model returned a malformed question")
+        return parsed
+
+    @staticmethod
+    async def generate_blog(topic: str, difficulty: str, word_count: int, include_code: bool, include_diagrams: bool = False, force_refresh: bool = False):
         prompt = f"Generate a comprehensive, engaging blog post about {topic} at a {difficulty} level. " \
                  f"It should be approximately {word_count} words long. " \
                  f"CRITICAL: Structure the content clearly using point-wise lists (bullet points) for better readability. " \
@@ -27,137 +109,221 @@ class AIService:
         system_prompt = "You are an expert technical blog writer. Output ONLY a valid JSON object with the following keys: 'title', 'content', 'seo_title', 'seo_description'. For 'content', use Markdown, heavily use bullet points, and NEVER use emojis."
 
         try:
-            response = await client.chat.completions.create(
-                model="google/gemini-2.0-flash-001",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            return await AIService._cached_completion(
+                "google/gemini-2.0-flash-001", system_prompt, prompt,
+                response_format={"type": "json_object"}, force_refresh=force_refresh,
+                parse=AIService._parse_blog,
             )
-            content = response.choices[0].message.content
-            parsed = json.loads(content)
-            # Handle cases where the model returns a list instead of a dict
-            if isinstance(parsed, list) and len(parsed) > 0:
-                parsed = parsed[0]
-            # Handle cases where the model nests the content under a "blog" key
-            if isinstance(parsed, dict) and "blog" in parsed:
-                parsed = parsed["blog"]
-            return parsed
         except Exception as e:
             return {"title": f"Error: {e}", "content": "Failed to generate blog.", "seo_title": "-", "seo_description": "-"}
 
+    @staticmethod
+    def _tutor_messages(message: str, history: list) -> list:
+        messages = [{"role": "system", "content": "You are a helpful AI tutor. Guide the student using Socratic questioning. Do not give direct answers immediately. DO NOT use emojis."}]
+        for msg in history:
+            messages.append(msg)
+        messages.append({"role": "user", "content": message})
+        return messages
+
     @staticmethod
     async def get_tutor_response(message: str, history: list):
+        """Tutor reply text; upstream failures raise so callers never mistake them for a reply."""
+        response = await client.chat.completions.create(
+            model="google/gemini-2.0-flash-001",
+            messages=AIService._tutor_messages(message, history)
+        )
+        return response.choices[0].message.content
+
+    @staticmethod
+    async def stream_tutor_response(message: str, history: list):
+        """Yield tutor reply text deltas as they arrive from the model."""
+        async for token in AIService._stream_completion("google/gemini-2.0-flash-001", AIService._tutor_messages(message, history)):
+            yield token
+
+    @staticmethod
+    async def _stream_completion(model: str, messages: list):
+        """
+        Stream a chat completion, yielding content deltas.
+
+        Closing this generator (e.g. on client disconnect) closes the upstream HTTP
+        stream, so the provider stops generating tokens nobody will read.
+        """
+        stream = await client.chat.completions.create(model=model, messages=messages, stream=True)
         try:
-            messages = [{"role": "system", "content": "You are a helpful AI tutor. Guide the student using Socratic questioning. Do not give direct answers immediately. DO NOT use emojis."}]
-            for msg in history:
-                messages.append(msg)
-            messages.append({"role": "user", "content": message})
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
 
-            response = await client.chat.completions.create(
-                model="google/gemini-2.0-flash-001",
-                messages=messages
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error: {e}"
+    @staticmethod
+    async def summarize_conversation(summary: str, messages: list) -> str:
+        """Fold older chat turns into the rolling summary of a conversation."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = (f"Current summary:\n{summary or '(none)'}\n\n"
+                  f"New turns to fold in:\n{transcript}")
+        response = await client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": "You maintain a running summary of a conversation between a user and an AI assistant. Merge the new turns into the current summary. Keep facts, goals, decisions, code identifiers and open questions the assistant may need later. Drop pleasantries. Write at most 200 words of plain prose. Output ONLY the updated summary."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.choices[0].message.content.strip()
 
     @staticmethod
-    async def generate_quiz(content: str):
+    async def generate_quiz(content: str, force_refresh: bool = False):
         try:
             prompt = f"Generate a multiple-choice quiz based on this content:\n\n{content}"
             system_prompt = "Output ONLY a valid JSON list of objects. Each object must have: 'question' (string), 'options' (list of exactly 4 strings), 'answer' (string matching one option EXACTLY). NO EMOJIS."
             
-            response = await client.chat.completions.create(
-                model="google/gemini-2.0-flash-001",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            return await AIService._cached_completion(
+                QUIZ_MODEL, system_prompt, prompt,
+                response_format={"type": "json_object"}, force_refresh=force_refresh,
+                parse=AIService._parse_quiz,
             )
-            parsed = json.loads(response.choices[0].message.content)
-            if isinstance(parsed, dict):
-                first_key = list(parsed.keys())[0]
-                if isinstance(parsed[first_key], list):
-                    return parsed[first_key]
-                return [parsed]
-            return parsed
         except Exception as e:
             return [{"question": f"Error: {e}", "options": ["-", "-", "-"], "answer": "-"}]
 
     @staticmethod
-    async def get_assistant_response(message: str, history: list, system_prompt: str = "You are a helpful AI Assistant.", image_data: str = None, model: str = "google/gemini-2.0-flash-001"):
-        try:
-            # Inject strict rule modifications into whatever the chosen base system prompt is
-            enhanced_sys_prompt = system_prompt + (
-                " CRITICAL RULES: 1. NO EMOJIS EVER. 2. Use point-wise lists (bullet points) extensively. "
-                "3. You ARE capable of reading uploaded files and seeing images. If the user attaches a file, its text is automatically extracted and provided to you in the prompt. If they attach an image, you can see it. Do NOT claim you cannot process files or images. "
-                "4. If the user asks you to generate, create, or draw an image or a video, explain that they need to click the 'Image Gen' or 'Video Gen' buttons located directly above the chat input box to use the dedicated image/video generation tools."
-            )
-            messages = [{"role": "system", "content": enhanced_sys_prompt}]
-            for msg in history:
-                messages.append(msg)
-
-            # If image data is provided, use multimodal message format
-            if image_data:
-                user_content = [
-                    {"type": "text", "text": message},
-                    {"type": "image_url", "image_url": {"url": image_data}}
-                ]
-                messages.append({"role": "user", "content": user_content})
-            else:
-                messages.append({"role": "user", "content": message})
+    def _assistant_messages(message: str, history: list, system_prompt: str, image_data: str = None) -> list:
+        # Inject strict rule modifications into whatever the chosen base system prompt is
+        enhanced_sys_prompt = system_prompt + (
+            " CRITICAL RULES: 1. NO EMOJIS EVER. 2. Use point-wise lists (bullet points) extensively. "
+            "3. You ARE capable of reading uploaded files and seeing images. If the user attaches a file, its text is automatically extracted and provided to you in the prompt. If they attach an image, you can see it. Do NOT claim you cannot process files or images. "
+            "4. If the user asks you to generate, create, or draw an image or a video, explain that they need to click the 'Image Gen' or 'Video Gen' buttons located directly above the chat input box to use the dedicated image/video generation tools."
+        )
+        messages = [{"role": "system", "content": enhanced_sys_prompt}]
+        for msg in history:
+            messages.append(msg)
 
-            response = await client.chat.completions.create(
-                model=model,
-                messages=messages
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error connecting to AI Assistant: {str(e)}"
+        # If image data is provided, use multimodal message format
+        if image_data:
+            user_content = [
+                {"type": "text", "text": message},
+                {"type": "image_url", "image_url": {"url": image_data}}
+            ]
+            messages.append({"role": "user", "content": user_content})
+        else:
+            messages.append({"role": "user", "content": message})
+        return messages
+
+    @staticmethod
+    async def _resolve_image(image_data: str = None, image_id: str = None) -> str:
+        """Prefer an uploaded image reference; its compact JPEG is only read here, per call."""
+        if image_id:
+            image_data = await chat_images.load_data_url(image_id)
+            if image_data is None:
+                raise ValueError(f"Unknown image id: {image_id}")
+        return image_data
+
+    @staticmethod
+    async def get_assistant_response(message: str, history: list, system_prompt: str = "You are a helpful AI Assistant.", image_data: str = None, model: str = "google/gemini-2.0-flash-001", image_id: str = None):
+        """Assistant reply text; upstream failures raise so callers never mistake them for a reply."""
+        image_data = await AIService._resolve_image(image_data, image_id)
+        response = await client.chat.completions.create(
+            model=model,
+            messages=AIService._assistant_messages(message, history, system_prompt, image_data)
+        )
+        return response.choices[0].message.content
+
+    @staticmethod
+    async def stream_assistant_response(message: str, history: list, system_prompt: str = "You are a helpful AI Assistant.", image_data: str = None, model: str = "google/gemini-2.0-flash-001", image_id: str = None):
+        """Yield assistant reply text deltas as they arrive from the model."""
+        image_data = await AIService._resolve_image(image_data, image_id)
+        messages = AIService._assistant_messages(message, history, system_prompt, image_data)
+        async for token in AIService._stream_completion(model, messages):
+            yield token
+
+    @staticmethod
+    async def _unsplash_random(query: str, headers: dict):
+        hc = get_http_client()
+        encoded_query = urllib.parse.quote(query)
+        unsplash_url = f"{settings.UNSPLASH_API_URL}/photos/random?query={encoded_query}"
+        res = await hc.get(unsplash_url, headers=headers, timeout=15.0)
+        if res.status_code == 200:
+            image_url = res.json().get('urls', {}).get('regular', '')
+            if image_url:
+                return image_url
+        print(f"Unsplash query '{query}' failed (status {res.status_code})")
+        return None
+
+    @staticmethod
+    async def _race_unsplash(queries: list, headers: dict):
+        """
+        Fire every candidate query at once and return the first successful image in
+        priority order; lower-priority requests still in flight are cancelled.
+        """
+        tasks = [asyncio.create_task(AIService._unsplash_random(q, headers)) for q in queries]
+        try:
+            for query, task in zip(queries, tasks):
+                try:
+                    image_url = await task
+                except Exception as e:
+                    print(f"Unsplash query '{query}' errored: {e}")
+                    continue
+                if image_url:
+                    print(f"Unsplash match found for query: '{query}'")
+                    return image_url
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
 
     @staticmethod
     async def generate_image(prompt: str):
         try:
             print(f"Generating image for prompt: {prompt}")
             
-            # Use Gemini to extract simple search keywords for Unsplash
-            response = await client.chat.completions.create(
-                model="google/gemini-2.0-flash-001",
-                messages=[
-                    {"role": "system", "content": "Extract 3 to 5 simple, concrete search keywords from the user's image request. Output ONLY the keywords separated by spaces. No sentences, no punctuation, no quotes. Example: 'sunset mountains lake'"},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            search_keywords = response.choices[0].message.content.strip()
+            # Level 1: repeated or lightly rephrased prompts skip the keyword-extraction LLM hop
+            keyword_key = _normalize_image_text(prompt)
+            search_keywords = keyword_cache.get(keyword_key)
+            if search_keywords is None:
+                # Use Gemini to extract simple search keywords for Unsplash
+                response = await client.chat.completions.create(
+                    model="google/gemini-2.0-flash-001",
+                    messages=[
+                        {"role": "system", "content": "Extract 3 to 5 simple, concrete search keywords from the user's image request. Output ONLY the keywords separated by spaces. No sentences, no punctuation, no quotes. Example: 'sunset mountains lake'"},
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+                search_keywords = response.choices[0].message.content.strip()
+                keyword_cache.put(keyword_key, search_keywords)
             print(f"Search keywords: {search_keywords}")
+
+            # Level 2: once a keyword set has a full pool of images, rotate through it
+            pool_key = _normalize_image_text(search_keywords)
+            pool = image_pool_cache.get(pool_key)
+            if pool is not None and len(pool["urls"]) >= settings.IMAGE_POOL_SIZE:
+                image_url = pool["urls"][pool["next"] % len(pool["urls"])]
+                pool["next"] += 1
+                print(f"Serving pooled image for keywords: '{search_keywords}'")
+                return {"url": image_url, "prompt": search_keywords}
             
             headers = {"Authorization": f"Client-ID {settings.UNSPLASH_SECRET_KEY}"}
             
             # Build search queries: combined keywords, individual keywords, then generic fallback
             individual_keywords = [kw.strip() for kw in search_keywords.split() if len(kw.strip()) > 2]
-            queries_to_try = [search_keywords] + individual_keywords[:3] + [prompt]
+            queries_to_try = list(dict.fromkeys([search_keywords] + individual_keywords[:3] + [prompt]))
             
-            async with httpx.AsyncClient() as hc:
-                image_url = None
-                for query in queries_to_try:
-                    encoded_query = urllib.parse.quote(query)
-                    unsplash_url = f"https://api.unsplash.com/photos/random?query={encoded_query}"
-                    res = await hc.get(unsplash_url, headers=headers)
-                    if res.status_code == 200:
-                        data = res.json()
-                        image_url = data.get('urls', {}).get('regular', '')
-                        if image_url:
-                            print(f"Unsplash match found for query: '{query}'")
-                            break
-                    print(f"Unsplash query '{query}' failed (status {res.status_code}), trying next...")
-                
+            image_url = await AIService._race_unsplash(queries_to_try, headers)
+
+            if image_url:
+                pool = pool or {"urls": [], "next": 0}
+                if image_url not in pool["urls"]:
+                    pool["urls"].append(image_url)
+                image_pool_cache.put(pool_key, pool)
+            elif pool and pool["urls"]:
+                # Unsplash is failing: a previously returned image beats the generic fallback
+                image_url = pool["urls"][pool["next"] % len(pool["urls"])]
+                pool["next"] += 1
+            else:
                 # Last resort: use picsum.photos random image
-                if not image_url:
-                    print("All Unsplash queries failed. Using picsum.photos fallback.")
-                    image_url = f"https://picsum.photos/1080/720?random={hash(prompt) % 10000}"
+                print("All Unsplash queries failed. Using picsum.photos fallback.")
+                image_url = f"https://picsum.photos/1080/720?random={hash(prompt) % 10000}"
             
             print(f"Successfully fetched Image URL: {image_url}")
             return {"url": image_url, "prompt": search_keywords}
@@ -167,77 +333,91 @@ class AIService:
             raise ValueError(f"Image generation failed: {str(e)}")
 
     @staticmethod
-    async def generate_video(prompt: str):
-        """Generate a video using fal.ai MiniMax Video API with proper status handling."""
-        FAL_BASE = "https://queue.fal.run/fal-ai/minimax-video"
-        headers = {
+    def _fal_headers() -> dict:
+        return {
             "Authorization": f"Key {settings.FAL_API_KEY}",
             "Content-Type": "application/json"
         }
 
+    @staticmethod
+    async def submit_video(prompt: str) -> dict:
+        """Submit a fal.ai MiniMax video job. Returns request_id, status_url and response_url."""
+        submit_res = await get_http_client().post(
+            settings.FAL_QUEUE_URL,
+            headers=AIService._fal_headers(),
+            json={"prompt": prompt, "prompt_optimizer": True}
+        )
+        if submit_res.status_code not in (200, 201, 202):
+            raise ValueError(f"fal.ai submit error ({submit_res.status_code}): {submit_res.text}")
+
+        submit_data = submit_res.json()
+        request_id = submit_data.get("request_id")
+        if not request_id:
+            raise ValueError(f"No request_id in fal.ai response: {submit_data}")
+        # Use the URLs provided by fal.ai response
+        return {
+            "request_id": request_id,
+            "status_url": submit_data.get("status_url", f"{settings.FAL_QUEUE_URL}/requests/{request_id}/status"),
+            "response_url": submit_data.get("response_url", f"{settings.FAL_QUEUE_URL}/requests/{request_id}"),
+        }
+
+    @staticmethod
+    async def get_video_status(status_url: str) -> dict:
+        """One status poll. Returns the fal.ai status payload, or {} on a transient error."""
+        status_res = await get_http_client().get(status_url, headers=AIService._fal_headers())
+        # fal.ai returns 202 for IN_PROGRESS/IN_QUEUE — this is normal!
+        if status_res.status_code not in (200, 202):
+            print(f"Status poll error: {status_res.status_code} {status_res.text}")
+            return {}
+        return status_res.json()
+
+    @staticmethod
+    async def get_video_result(result_url: str) -> str:
+        result_res = await get_http_client().get(result_url, headers=AIService._fal_headers())
+        if result_res.status_code != 200:
+            raise ValueError(f"fal.ai result error ({result_res.status_code}): {result_res.text}")
+
+        result_data = result_res.json()
+        video_url = result_data.get("video", {}).get("url", "")
+        if not video_url:
+            raise ValueError(f"No video URL in result: {result_data}")
+        return video_url
+
+    @staticmethod
+    async def generate_video(prompt: str):
+        """Generate a video using fal.ai MiniMax Video API, blocking until it completes.
+
+        The HTTP API goes through app.core.jobs instead; this is kept for scripts.
+        """
         try:
             print(f"Generating video for prompt: {prompt}")
 
-            async with httpx.AsyncClient(timeout=60.0) as hc:
-                # 1. Submit the job to the queue
-                submit_res = await hc.post(
-                    FAL_BASE,
-                    headers=headers,
-                    json={"prompt": prompt, "prompt_optimizer": True}
-                )
-                if submit_res.status_code not in (200, 201, 202):
-                    raise ValueError(f"fal.ai submit error ({submit_res.status_code}): {submit_res.text}")
-
-                submit_data = submit_res.json()
-                request_id = submit_data.get("request_id")
-                # Use the URLs provided by fal.ai response
-                status_url = submit_data.get("status_url", f"{FAL_BASE}/requests/{request_id}/status")
-                result_url = submit_data.get("response_url", f"{FAL_BASE}/requests/{request_id}")
-
-                if not request_id:
-                    raise ValueError(f"No request_id in fal.ai response: {submit_data}")
-
-                print(f"fal.ai job submitted: {request_id}")
-                print(f"Status URL: {status_url}")
-
-                # 2. Poll for completion (max 5 minutes)
-                max_wait = 300
-                elapsed = 0
-                poll_interval = 5
-
-                while elapsed < max_wait:
-                    await asyncio.sleep(poll_interval)
-                    elapsed += poll_interval
-
-                    status_res = await hc.get(status_url, headers=headers)
-                    # fal.ai returns 202 for IN_PROGRESS/IN_QUEUE — this is normal!
-                    if status_res.status_code not in (200, 202):
-                        print(f"Status poll error: {status_res.status_code} {status_res.text}")
-                        continue
-
-                    status_data = status_res.json()
-                    status = status_data.get("status", "").upper()
-                    print(f"fal.ai job status ({elapsed}s): {status}")
-
-                    if status == "COMPLETED":
-                        break
-                    elif status in ("FAILED", "CANCELLED"):
-                        raise ValueError(f"fal.ai job {status}: {status_data}")
-                else:
-                    raise ValueError("Video generation timed out after 5 minutes.")
-
-                # 3. Fetch the result
-                result_res = await hc.get(result_url, headers=headers)
-                if result_res.status_code != 200:
-                    raise ValueError(f"fal.ai result error ({result_res.status_code}): {result_res.text}")
-
-                result_data = result_res.json()
-                video_url = result_data.get("video", {}).get("url", "")
-                if not video_url:
-                    raise ValueError(f"No video URL in result: {result_data}")
-
-                print(f"Video generated successfully: {video_url}")
-                return {"url": video_url, "prompt": prompt}
+            job = await AIService.submit_video(prompt)
+            print(f"fal.ai job submitted: {job['request_id']}")
+
+            # Poll for completion (max 5 minutes)
+            max_wait = 300
+            elapsed = 0
+            poll_interval = 5
+
+            while elapsed < max_wait:
+                await asyncio.sleep(poll_interval)
+                elapsed += poll_interval
+
+                status_data = await AIService.get_video_status(job["status_url"])
+                status = status_data.get("status", "").upper()
+                print(f"fal.ai job status ({elapsed}s): {status}")
+
+                if status == "COMPLETED":
+                    break
+                elif status in ("FAILED", "CANCELLED"):
+                    raise ValueError(f"fal.ai job {status}: {status_data}")
+            else:
+                raise ValueError("Video generation timed out after 5 minutes.")
+
+            video_url = await AIService.get_video_result(job["response_url"])
+            print(f"Video generated successfully: {video_url}")
+            return {"url": video_url, "prompt": prompt}
 
         except Exception as e:
             print(f"Error in generate_video: {e}")
@@ -0,0 +1,94 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.models.base_models import User
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Verified users keyed by access-token hash, so an authenticated request needs
+    neither a JWT decode nor a MongoDB lookup on a hit.
+
+    Entries live for at most AUTH_CACHE_TTL_SECONDS and never past the token's own
+    ``exp``. Writes to a user must call ``invalidate_subject`` so every token for
+    that user is dropped at once. Invalidation is per process: other workers see
+    the change once their entry's TTL runs out.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_subject: Dict[str, Set[str]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[User]:
+        key = token_key(token)
+        item = self._entries.get(key)
+        if item is not None:
+            expires_at, subject, user = item
+            if time.time() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                # Routes mutate current_user in place; never hand out the cached instance
+                return user.model_copy(deep=True)
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def put(self, token: str, subject: str, token_exp: Optional[float], user: User) -> None:
+        key = token_key(token)
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        self._drop(key)
+        self._entries[key] = (expires_at, subject, user.model_copy(deep=True))
+        self._by_subject.setdefault(subject, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        subject = item[1]
+        keys = self._by_subject.get(subject)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_subject[subject]
+
+    def invalidate_subject(self, subject: str) -> None:
+        for key in list(self._by_subject.get(subject, ())):
+            self._drop(key)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_subject.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "subjects": len(self._by_subject),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
@@ -0,0 +1,86 @@
+import json
+import datetime
+from typing import AsyncIterator, Dict, List, Union
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+
+from app.models.base_models import Blog
+from app.core.render import render_markdown
+from app.schemas.blog import BlogImport
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+async def export_ndjson() -> AsyncIterator[bytes]:
+    """Yield one JSON line per blog, streaming straight off the Mongo cursor."""
+    async for row in Blog.find_all().sort("created_at").project(BlogImport):
+        yield row.model_dump_json().encode("utf-8") + b"\n"
+
+
+async def iter_lines(chunks: AsyncIterator[Union[bytes, str]]) -> AsyncIterator[bytes]:
+    """Re-split an arbitrary chunked byte stream on newlines."""
+    buffer = b""
+    async for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _upsert_op(blog: BlogImport, overwrite: bool) -> UpdateOne:
+    fields = blog.model_dump(exclude={"created_at"})
+    # Bulk writes bypass Beanie events, so render here to keep stored HTML in sync
+    fields.update(render_markdown(blog.content))
+    on_insert = {"created_at": blog.created_at or datetime.datetime.utcnow(), "views": 0}
+    if not overwrite:
+        return UpdateOne({"slug": blog.slug}, {"$setOnInsert": {**fields, **on_insert}}, upsert=True)
+    return UpdateOne({"slug": blog.slug}, {"$set": fields, "$setOnInsert": on_insert}, upsert=True)
+
+
+async def import_ndjson(
+    chunks: AsyncIterator[Union[bytes, str]],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    overwrite: bool = True,
+) -> Dict:
+    """
+    Validate each NDJSON line against BlogImport and upsert by slug in batches.
+
+    Only one batch of operations is held at a time, so memory stays flat however
+    large the input is. Bad lines are reported by line number and skipped.
+    With ``overwrite=False`` existing slugs are left untouched.
+    """
+    collection = Blog.get_motor_collection()
+    report = {"processed": 0, "inserted": 0, "updated": 0, "error_count": 0, "errors": []}
+    batch: List[UpdateOne] = []
+
+    async def write_batch():
+        result = await collection.bulk_write(batch, ordered=False)
+        report["inserted"] += result.upserted_count
+        report["updated"] += result.modified_count
+        batch.clear()
+
+    line_no = 0
+    async for raw in iter_lines(chunks):
+        line_no += 1
+        if not raw.strip():
+            continue
+        report["processed"] += 1
+        try:
+            blog = BlogImport.model_validate(json.loads(raw))
+        except (ValueError, ValidationError) as e:
+            report["error_count"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"line": line_no, "error": str(e)})
+            continue
+        batch.append(_upsert_op(blog, overwrite))
+        if len(batch) >= batch_size:
+            await write_batch()
+    if batch:
+        await write_batch()
+    return report
@@ -0,0 +1,257 @@
+import asyncio
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fastapi import Response, status
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip-only fallback
+    brotli = None
+
+from app.core.config import settings
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 10
+# Listings are keyed by query and dropped on every write, so they favour speed over ratio
+LISTING_GZIP_LEVEL = 6
+LISTING_BROTLI_QUALITY = 5
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+def make_etag(body: bytes) -> str:
+    """Strong validator derived from the serialized body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _strip_encoding_suffix(etag: str) -> str:
+    for encoding in ENCODING_PREFERENCE:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison, so W/ prefixes are ignored. Encoded
+    variants of the same version carry a suffixed ETag and also match.
+    """
+    if not if_none_match:
+        return False
+    etag = _strip_encoding_suffix(etag)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if _strip_encoding_suffix(candidate) == etag:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> Optional[str]:
+    """Pick the best of the ``available`` content-codings for an Accept-Encoding header."""
+    if not accept_encoding or not available:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, brotli_quality: int = BROTLI_QUALITY, gzip_level: int = GZIP_LEVEL) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def encode_variants(body: bytes, brotli_quality: int = BROTLI_QUALITY, gzip_level: int = GZIP_LEVEL) -> Dict[str, bytes]:
+    """Every supported encoding of ``body`` that actually comes out smaller."""
+    variants: Dict[str, bytes] = {}
+    if len(body) < settings.COMPRESSION_MIN_BYTES:
+        return variants
+    for encoding in ENCODING_PREFERENCE:
+        if encoding == "br" and brotli is None:
+            continue
+        encoded = compress(body, encoding, brotli_quality, gzip_level)
+        if len(encoded) < len(body):
+            variants[encoding] = encoded
+    return variants
+
+
+class CachedResponse:
+    """
+    A serialized response plus its precompressed variants.
+
+    Variants are produced once when the entry is built — i.e. once per document
+    version — and only for bodies above COMPRESSION_MIN_BYTES. Use ``build`` so
+    the compression runs on a worker thread instead of the event loop.
+    """
+    __slots__ = ("body", "etag", "media_type", "variants")
+
+    def __init__(self, body: bytes, media_type: str = "application/json", variants: Optional[Dict[str, bytes]] = None):
+        self.body = body
+        self.etag = make_etag(body)
+        self.media_type = media_type
+        self.variants: Dict[str, bytes] = variants or {}
+
+    @classmethod
+    async def build(
+        cls,
+        body: bytes,
+        media_type: str = "application/json",
+        brotli_quality: int = BROTLI_QUALITY,
+        gzip_level: int = GZIP_LEVEL,
+    ) -> "CachedResponse":
+        variants = {}
+        if len(body) >= settings.COMPRESSION_MIN_BYTES:
+            variants = await asyncio.to_thread(encode_variants, body, brotli_quality, gzip_level)
+        return cls(body, media_type, variants)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def negotiate(self, accept_encoding: Optional[str]):
+        """Return (body, content_encoding, etag) for the client's Accept-Encoding."""
+        encoding = choose_encoding(accept_encoding, self.variants)
+        if encoding is None:
+            return self.body, None, self.etag
+        return self.variants[encoding], encoding, self.etag[:-1] + f'-{encoding}"'
+
+
+def cached_response(
+    entry: CachedResponse,
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Answer from a cache entry: 304 on a matching validator, else the best precompressed variant."""
+    body, encoding, etag = entry.negotiate(accept_encoding)
+    headers = {**(headers or {}), "ETag": etag, "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=entry.media_type, headers=headers)
+
+
+class ResponseCache:
+    """
+    LRU of serialized responses bounded by total body bytes rather than entry count.
+
+    Entries larger than a quarter of the budget are not stored so a single huge
+    post cannot flush everything else.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> CachedResponse:
+        self.invalidate(key)
+        if entry.size > self.max_bytes // 4:
+            return entry
+        self._entries[key] = entry
+        self.current_bytes += entry.size
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.size
+        return entry
+
+    def invalidate(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class TTLCache:
+    """Small LRU of arbitrary values with a per-entry time-to-live."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        item = self._entries.get(key)
+        if item is not None:
+            expires_at, value = item
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -6,19 +6,105 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-it")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # bcrypt work factor for new hashes (existing ones are upgraded on login) and hashing threads (0 = CPU count)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    # get_current_user cache of verified users, keyed by token
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    # Comma-separated proxy IPs/CIDRs (e.g. "10.0.0.0/8,127.0.0.1") whose X-Forwarded-For is trusted.
+    # Without it every client behind a proxy shares the proxy's rate limits and admission bucket.
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "")
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     MONGODB_DB_NAME: str = os.getenv("MONGODB_DB_NAME", "aieracademy_db")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENROUTER_API_KEY: str = os.getenv("OPENROUTER_API_KEY", "")
     UNSPLASH_SECRET_KEY: str = os.getenv("UNSPLASH_SECRET_KEY", "")
+    # Upstream API roots; point at ai_stub_server.py for load tests and offline dev
+    OPENROUTER_BASE_URL: str = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+    UNSPLASH_API_URL: str = os.getenv("UNSPLASH_API_URL", "https://api.unsplash.com")
     FAL_API_KEY: str = os.getenv("FAL_API_KEY", "")
+    # fal.ai queue endpoint; point at a local stand-in for tests and load runs
+    FAL_QUEUE_URL: str = os.getenv("FAL_QUEUE_URL", "https://queue.fal.run/fal-ai/minimax-video")
+    # generate_image caches: prompt -> keywords, keywords -> rotating pool of image URLs
+    IMAGE_CACHE_MAX_ENTRIES: int = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "1024"))
+    IMAGE_KEYWORD_TTL_SECONDS: int = int(os.getenv("IMAGE_KEYWORD_TTL_SECONDS", str(24 * 3600)))
+    IMAGE_POOL_TTL_SECONDS: int = int(os.getenv("IMAGE_POOL_TTL_SECONDS", "3600"))
+    IMAGE_POOL_SIZE: int = int(os.getenv("IMAGE_POOL_SIZE", "5"))
+    # Admission control for upstream AI calls
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "16"))
+    AI_MODEL_CONCURRENCY: int = int(os.getenv("AI_MODEL_CONCURRENCY", "8"))
+    AI_MODEL_LIMITS: str = os.getenv("AI_MODEL_LIMITS", "")  # e.g. "openai/gpt-4o=2,google/gemini-2.0-flash-001=12"
+    AI_QUEUE_MAX: int = int(os.getenv("AI_QUEUE_MAX", "64"))
+    AI_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("AI_QUEUE_TIMEOUT_SECONDS", "20"))
+    AI_USER_RATE_PER_MINUTE: float = float(os.getenv("AI_USER_RATE_PER_MINUTE", "30"))
+    AI_USER_BURST: int = int(os.getenv("AI_USER_BURST", "10"))
+    # Server-side chat history: token budget for summary + verbatim turns, and turns always kept verbatim
+    CHAT_HISTORY_TOKEN_BUDGET: int = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+    CHAT_RECENT_MESSAGES: int = int(os.getenv("CHAT_RECENT_MESSAGES", "6"))
+    # Conversations untouched for this long are deleted by MongoDB's TTL monitor
+    CHAT_HISTORY_TTL_SECONDS: int = int(os.getenv("CHAT_HISTORY_TTL_SECONDS", str(30 * 24 * 3600)))
+    # Blog -> quiz batch pipeline: parallel model calls, chunk size and attempts per chunk
+    QUIZ_BATCH_CONCURRENCY: int = int(os.getenv("QUIZ_BATCH_CONCURRENCY", "4"))
+    QUIZ_CHUNK_CHARS: int = int(os.getenv("QUIZ_CHUNK_CHARS", "6000"))
+    QUIZ_MAX_ATTEMPTS: int = int(os.getenv("QUIZ_MAX_ATTEMPTS", "3"))
+    # Images attached to assistant chats: upload cap, downscaled size and JPEG quality
+    CHAT_IMAGE_DIR: str = os.getenv("CHAT_IMAGE_DIR", "chat_images")
+    CHAT_IMAGE_MAX_UPLOAD_BYTES: int = int(os.getenv("CHAT_IMAGE_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+    CHAT_IMAGE_MAX_SIDE: int = int(os.getenv("CHAT_IMAGE_MAX_SIDE", "1024"))
+    CHAT_IMAGE_QUALITY: int = int(os.getenv("CHAT_IMAGE_QUALITY", "85"))
+    # Uploads are anonymous, so the store is swept: images unused this long go, then the least
+    # recently used until the directory is under the byte cap
+    CHAT_IMAGE_RETENTION_SECONDS: int = int(os.getenv("CHAT_IMAGE_RETENTION_SECONDS", str(7 * 24 * 3600)))
+    CHAT_IMAGE_MAX_TOTAL_BYTES: int = int(os.getenv("CHAT_IMAGE_MAX_TOTAL_BYTES", str(1024 * 1024 * 1024)))
+    CHAT_IMAGE_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("CHAT_IMAGE_SWEEP_INTERVAL_SECONDS", "3600"))
+    # Profile pictures: upload cap, longest side kept for the full image, and square thumbnail sizes
+    AVATAR_MAX_UPLOAD_BYTES: int = int(os.getenv("AVATAR_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+    AVATAR_MAX_SIDE: int = int(os.getenv("AVATAR_MAX_SIDE", "512"))
+    AVATAR_SIZES: str = os.getenv("AVATAR_SIZES", "64,128,256")
+    AVATAR_QUALITY: int = int(os.getenv("AVATAR_QUALITY", "85"))
+    # Shared outbound HTTP client pool
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+    # Background video jobs: worker count, poll interval and per-job deadline
+    VIDEO_JOB_WORKERS: int = int(os.getenv("VIDEO_JOB_WORKERS", "2"))
+    VIDEO_POLL_INTERVAL_SECONDS: float = float(os.getenv("VIDEO_POLL_INTERVAL_SECONDS", "5"))
+    VIDEO_JOB_TIMEOUT_SECONDS: int = int(os.getenv("VIDEO_JOB_TIMEOUT_SECONDS", "300"))
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    # Public frontend origin used for sitemap and feed links
+    SITE_URL: str = os.getenv("SITE_URL", "http://localhost:3000")
+    # In-process cache of serialized blog responses, bounded by body bytes
+    BLOG_CACHE_MAX_BYTES: int = int(os.getenv("BLOG_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # Responses smaller than this are never compressed
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    # How often buffered blog view counts are written back to MongoDB
+    VIEW_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "30"))
+    # LLM prompt-result cache: in-memory LRU size and MongoDB TTL
+    PROMPT_CACHE_MAX_ENTRIES: int = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "256"))
+    PROMPT_CACHE_TTL_SECONDS: int = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    # OTP lifetime, wrong guesses allowed per code, and sends allowed per email / per IP within the window
+    OTP_TTL_SECONDS: int = int(os.getenv("OTP_TTL_SECONDS", "600"))
+    OTP_MAX_ATTEMPTS: int = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+    OTP_MAX_SENDS_PER_EMAIL: int = int(os.getenv("OTP_MAX_SENDS_PER_EMAIL", "3"))
+    OTP_MAX_SENDS_PER_IP: int = int(os.getenv("OTP_MAX_SENDS_PER_IP", "10"))
+    OTP_SEND_WINDOW_SECONDS: int = int(os.getenv("OTP_SEND_WINDOW_SECONDS", "600"))
     # Email / SMTP settings for OTP
     SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     EMAIL_FROM: str = os.getenv("EMAIL_FROM", "noreply@aiera.academy")
+    # Set to "false" for a plain local stand-in such as aiosmtpd
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "15"))
+    # Sessions idle longer than this are probed with NOOP before reuse
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+    # Outbound mail queue: worker threads (one SMTP session each), queue bound and retry policy
+    MAIL_WORKERS: int = int(os.getenv("MAIL_WORKERS", "2"))
+    MAIL_QUEUE_MAX: int = int(os.getenv("MAIL_QUEUE_MAX", "1000"))
+    MAIL_MAX_ATTEMPTS: int = int(os.getenv("MAIL_MAX_ATTEMPTS", "4"))
+    MAIL_RETRY_BASE_SECONDS: float = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "2"))
 
     class Config:
         env_file = ".env"
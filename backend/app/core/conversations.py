@@ -0,0 +1,172 @@
+import asyncio
+import datetime
+import hashlib
+import hmac
+import secrets
+from typing import List, Optional, Set, Tuple
+
+from beanie import PydanticObjectId
+
+from app.core.admission import admission, AdmissionRejected
+from app.core.ai_service import AIService, SUMMARY_MODEL
+from app.core.config import settings
+from app.models.base_models import ChatHistory
+
+# Rough per-message framing cost on top of the text itself
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token); good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: dict) -> int:
+    content = message.get("content")
+    return estimate_tokens(content if isinstance(content, str) else str(content)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+class ConversationStore:
+    """
+    Server-side chat history so clients only send the new message.
+
+    Each conversation keeps a rolling summary plus the most recent turns verbatim.
+    After a turn is recorded, if summary + turns exceed the token budget the oldest
+    turns are folded into the summary (in the background, down to half the budget
+    so it does not re-run every turn). The prompt sent upstream is therefore
+    bounded by the budget however long the conversation gets.
+
+    Clients address a conversation by an ``{id}.{secret}`` token and only a hash
+    of the secret is stored, so the ObjectId alone grants nothing. A new
+    conversation is written with its first recorded turn, and idle ones expire
+    after CHAT_HISTORY_TTL_SECONDS.
+    """
+
+    def __init__(self, token_budget: int, recent_messages: int):
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self.compactions = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self, owner: str, kind: str = "assistant") -> Tuple[ChatHistory, str]:
+        """A new, not yet stored conversation and the token the client must send back."""
+        secret = secrets.token_urlsafe(24)
+        conversation = ChatHistory(id=PydanticObjectId(), user_id=owner, kind=kind, secret_hash=_hash_secret(secret))
+        return conversation, f"{conversation.id}.{secret}"
+
+    async def open(self, token: str) -> Optional[ChatHistory]:
+        """Load the conversation a ``{id}.{secret}`` token refers to, or None."""
+        conversation_id, _, secret = (token or "").partition(".")
+        try:
+            oid = PydanticObjectId(conversation_id)
+        except Exception:
+            return None
+        conversation = await ChatHistory.get(oid)
+        if conversation is None or not conversation.secret_hash:
+            return None
+        if not hmac.compare_digest(conversation.secret_hash, _hash_secret(secret)):
+            return None
+        return conversation
+
+    def context(self, conversation: ChatHistory) -> List[dict]:
+        """History to send upstream: the summary, then as many recent turns as fit the budget."""
+        history: List[dict] = []
+        budget = self.token_budget
+        if conversation.summary:
+            summary = {"role": "system", "content": f"Summary of the earlier conversation: {conversation.summary}"}
+            budget -= message_tokens(summary)
+            history.append(summary)
+        # Normally everything fits after compaction; this guards the window if a compaction failed
+        recent: List[dict] = []
+        for message in reversed(conversation.messages):
+            cost = message_tokens(message)
+            if recent and cost > budget:
+                break
+            budget -= cost
+            recent.append({"role": message["role"], "content": message["content"]})
+        history.extend(reversed(recent))
+        return history
+
+    async def record_turn(self, conversation: ChatHistory, message: str, reply: str) -> None:
+        turn = [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+        now = datetime.datetime.utcnow()
+        # Upsert: a conversation from start() is first written here, with its first turn
+        await ChatHistory.get_motor_collection().update_one(
+            {"_id": conversation.id},
+            {
+                "$push": {"messages": {"$each": turn}},
+                "$inc": {"version": 1},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {
+                    "user_id": conversation.user_id,
+                    "kind": conversation.kind,
+                    "secret_hash": conversation.secret_hash,
+                    "summary": "",
+                    "summarized_messages": 0,
+                    "timestamp": now,
+                },
+            },
+            upsert=True,
+        )
+        task = asyncio.create_task(self.compact(conversation.id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _fold_count(self, conversation: ChatHistory) -> int:
+        """How many of the oldest messages to fold into the summary (0 if within budget)."""
+        messages = conversation.messages
+        total = estimate_tokens(conversation.summary) + sum(message_tokens(m) for m in messages)
+        if total <= self.token_budget:
+            return 0
+        target = self.token_budget // 2
+        fold = 0
+        keep_from = max(0, len(messages) - self.recent_messages)
+        while fold < keep_from and total > target:
+            total -= message_tokens(messages[fold])
+            fold += 1
+        return fold
+
+    async def compact(self, conversation_id: PydanticObjectId) -> bool:
+        try:
+            conversation = await ChatHistory.get(conversation_id)
+            if conversation is None:
+                return False
+            fold = self._fold_count(conversation)
+            if not fold:
+                return False
+            # Summaries are upstream calls too; they count against the owner's admission budget
+            async with admission.slot(conversation.user_id or "conversations", SUMMARY_MODEL):
+                summary = await AIService.summarize_conversation(conversation.summary, conversation.messages[:fold])
+            # Only apply if no turn landed meanwhile; the next turn retries otherwise
+            result = await ChatHistory.get_motor_collection().update_one(
+                {"_id": conversation.id, "version": conversation.version},
+                {
+                    "$set": {
+                        "summary": summary,
+                        "messages": conversation.messages[fold:],
+                        "summarized_messages": conversation.summarized_messages + fold,
+                    },
+                    "$inc": {"version": 1},
+                },
+            )
+            if result.modified_count:
+                self.compactions += 1
+                return True
+        except AdmissionRejected as e:
+            # Still over budget, so the next turn tries again
+            print(f"Conversation {conversation_id} compaction deferred: {e.reason}")
+        except Exception as e:
+            print(f"Conversation {conversation_id} compaction failed: {e}")
+        return False
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+conversation_store = ConversationStore(settings.CHAT_HISTORY_TOKEN_BUDGET, settings.CHAT_RECENT_MESSAGES)
@@ -0,0 +1,64 @@
+from collections import Counter
+from typing import Dict, List
+
+from app.models.base_models import Blog
+
+# One round trip: category and tag counts over published posts
+FACET_PIPELINE = [
+    {"$match": {"is_published": True}},
+    {"$facet": {
+        "categories": [
+            {"$match": {"category": {"$ne": None}}},
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+        ],
+        "tags": [
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        ],
+    }},
+]
+
+
+class BlogFacets:
+    """
+    Materialized category and tag counts for published blogs.
+
+    Kept current by add()/remove() on every write; rebuild() recomputes from
+    MongoDB with an aggregation pipeline for startup and repair.
+    """
+
+    def __init__(self):
+        self.categories: Counter = Counter()
+        self.tags: Counter = Counter()
+
+    def _apply(self, blog, delta: int) -> None:
+        if not blog.is_published:
+            return
+        if blog.category:
+            self.categories[blog.category] += delta
+        for tag in set(blog.tags or []):
+            self.tags[tag] += delta
+        # Drop zeroed keys so removed facets disappear from the response
+        self.categories = +self.categories
+        self.tags = +self.tags
+
+    def add(self, blog) -> None:
+        self._apply(blog, 1)
+
+    def remove(self, blog) -> None:
+        self._apply(blog, -1)
+
+    async def rebuild(self) -> None:
+        rows = await Blog.get_motor_collection().aggregate(FACET_PIPELINE).to_list(length=1)
+        result = rows[0] if rows else {}
+        self.categories = Counter({r["_id"]: r["count"] for r in result.get("categories", [])})
+        self.tags = Counter({r["_id"]: r["count"] for r in result.get("tags", [])})
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        return {
+            "categories": [{"name": k, "count": v} for k, v in self.categories.most_common()],
+            "tags": [{"name": k, "count": v} for k, v in self.tags.most_common()],
+        }
+
+
+blog_facets = BlogFacets()
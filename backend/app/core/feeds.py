@@ -0,0 +1,137 @@
+import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from app.core.cache import CachedResponse
+from app.core.config import settings
+
+FEED_ITEMS = 50
+
+
+def _blog_url(slug: str) -> str:
+    return f"{settings.SITE_URL.rstrip('/')}/blog/{quote(slug)}"
+
+
+def _utc(dt: datetime.datetime) -> datetime.datetime:
+    return dt.replace(tzinfo=datetime.timezone.utc) if dt.tzinfo is None else dt
+
+
+class FeedStore:
+    """
+    sitemap.xml, rss.xml and atom.xml for published posts, kept in memory.
+
+    A small per-post entry table is maintained from blog writes; each document is
+    rendered once on first request after a change and then served with ETag and
+    Last-Modified until the next create/delete marks the store dirty.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, dict] = {}
+        self.last_modified = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        self._built: Dict[str, CachedResponse] = {}
+
+    def _changed(self) -> None:
+        self._built.clear()
+        self.last_modified = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self._changed()
+
+    def add(self, blog) -> None:
+        # Drafts stay out of the sitemap and feeds, as they do in the facet counts
+        if not blog.is_published:
+            self.remove(blog.slug)
+            return
+        self.entries[blog.slug] = {
+            "slug": blog.slug,
+            "title": blog.seo_title or blog.title,
+            "description": blog.seo_description or "",
+            "created_at": _utc(blog.created_at),
+        }
+        self._changed()
+
+    def remove(self, slug: str) -> None:
+        if self.entries.pop(slug, None) is not None:
+            self._changed()
+
+    def not_modified_since(self, if_modified_since: Optional[str]) -> bool:
+        if not if_modified_since:
+            return False
+        try:
+            return self.last_modified <= _utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+
+    def headers(self) -> Dict[str, str]:
+        return {"Last-Modified": format_datetime(self.last_modified, usegmt=True)}
+
+    async def get(self, name: str) -> CachedResponse:
+        entry = self._built.get(name)
+        if entry is None:
+            builder = {"sitemap": self._sitemap, "rss": self._rss, "atom": self._atom}[name]
+            media_type = {"sitemap": "application/xml", "rss": "application/rss+xml", "atom": "application/atom+xml"}[name]
+            entry = self._built[name] = await CachedResponse.build(builder().encode("utf-8"), media_type=media_type)
+        return entry
+
+    def _newest(self, limit: Optional[int] = None):
+        items = sorted(self.entries.values(), key=lambda e: e["created_at"], reverse=True)
+        return items[:limit] if limit else items
+
+    def _sitemap(self) -> str:
+        site = settings.SITE_URL.rstrip("/")
+        urls = [f"<url><loc>{escape(site)}/</loc></url>", f"<url><loc>{escape(site)}/blog</loc></url>"]
+        for e in self._newest():
+            urls.append(
+                f"<url><loc>{escape(_blog_url(e['slug']))}</loc>"
+                f"<lastmod>{e['created_at'].date().isoformat()}</lastmod></url>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + "".join(urls) + "</urlset>"
+        )
+
+    def _rss(self) -> str:
+        site = settings.SITE_URL.rstrip("/")
+        items = []
+        for e in self._newest(FEED_ITEMS):
+            url = escape(_blog_url(e["slug"]))
+            items.append(
+                f"<item><title>{escape(e['title'])}</title><link>{url}</link>"
+                f'<guid isPermaLink="true">{url}</guid>'
+                f"<description>{escape(e['description'])}</description>"
+                f"<pubDate>{format_datetime(e['created_at'], usegmt=True)}</pubDate></item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+            f"<title>{escape(settings.PROJECT_NAME)}</title><link>{escape(site)}/blog</link>"
+            f"<description>{escape(settings.PROJECT_NAME)} blog</description>"
+            f"<lastBuildDate>{format_datetime(self.last_modified, usegmt=True)}</lastBuildDate>"
+            + "".join(items) + "</channel></rss>"
+        )
+
+    def _atom(self) -> str:
+        site = settings.SITE_URL.rstrip("/")
+        entries = []
+        for e in self._newest(FEED_ITEMS):
+            url = escape(_blog_url(e["slug"]))
+            stamp = e["created_at"].isoformat()
+            entries.append(
+                f"<entry><title>{escape(e['title'])}</title>"
+                f'<link href="{url}"/><id>{url}</id>'
+                f"<updated>{stamp}</updated><published>{stamp}</published>"
+                f"<summary>{escape(e['description'])}</summary></entry>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>{escape(settings.PROJECT_NAME)}</title>"
+            f'<link href="{escape(site)}/blog"/><id>{escape(site)}/blog</id>'
+            f"<updated>{self.last_modified.isoformat()}</updated>"
+            + "".join(entries) + "</feed>"
+        )
+
+
+feed_store = FeedStore()
@@ -0,0 +1,297 @@
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import re
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from fastapi import UploadFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+_IMAGE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+async def spool_upload(upload: UploadFile, max_bytes: int) -> Tuple[str, str]:
+    """
+    Copy an upload to a file in the system temp directory chunk by chunk, hashing
+    as it goes, and return (temp path, sha256 hex). Raw uploads never land in a
+    store's directory, which may be publicly served. Writes run on a worker thread
+    and the copy stops as soon as ``max_bytes`` is exceeded. The caller owns the file.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise ImageTooLarge(f"Image exceeds {max_bytes} bytes")
+    digest = hashlib.sha256()
+    size = 0
+    fd, raw_path = tempfile.mkstemp(suffix=".upload")
+    raw = os.fdopen(fd, "wb")
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ImageTooLarge(f"Image exceeds {max_bytes} bytes")
+            digest.update(chunk)
+            await asyncio.to_thread(raw.write, chunk)
+        raw.close()
+    except BaseException:
+        raw.close()
+        os.unlink(raw_path)
+        raise
+    return raw_path, digest.hexdigest()
+
+
+def _open_rgb(raw_path: str) -> Image.Image:
+    """Decode an image upright and flattened onto white; JPEG has no alpha channel."""
+    try:
+        with Image.open(raw_path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode == "RGB":
+                img.load()
+                return img
+            rgba = img.convert("RGBA")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValueError("Unsupported or corrupt image.")
+    flat = Image.new("RGB", rgba.size, (255, 255, 255))
+    flat.paste(rgba, mask=rgba.getchannel("A"))
+    return flat
+
+
+def _save_jpeg(img: Image.Image, path: str, quality: int) -> None:
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality, optimize=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write a uniquely named file then rename, so a concurrent reader never sees a
+    # partial file and two threads storing the same image never share a temp path
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(buffer.getvalue())
+        # mkstemp creates 0600; the avatar directory is served by the static mount
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _writable_root(root: str) -> str:
+    try:
+        os.makedirs(root, exist_ok=True)
+    except OSError:
+        # Read-only filesystem (e.g. serverless): fall back to /tmp like the static mount
+        root = os.path.join("/tmp", root)
+        os.makedirs(root, exist_ok=True)
+    return root
+
+
+class ChatImageStore:
+    """
+    Content-addressed store for images attached to assistant chats.
+
+    Uploads are copied to disk in chunks while being hashed, then downscaled to at
+    most CHAT_IMAGE_MAX_SIDE pixels and re-encoded as JPEG off the event loop. The
+    id is derived from the original bytes, so re-uploading the same image is a
+    no-op. Only the compact JPEG is kept; it is read back and turned into a data
+    URL when the upstream message is built.
+
+    Uploads need no account, so files are swept: re-uploading or chatting about an
+    image refreshes its mtime, images idle longer than ``retention_seconds`` are
+    deleted, and beyond ``max_total_bytes`` the least recently used go first. The
+    sweep runs every interval and as soon as an upload pushes the total over the cap.
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_side: int, quality: int,
+                 retention_seconds: int, max_total_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_side = max_side
+        self.quality = quality
+        self.retention_seconds = retention_seconds
+        self.max_total_bytes = max_total_bytes
+        self.root = _writable_root(root)
+        self.swept = 0
+        # Approximate bytes on disk: exact after each sweep, plus uploads since
+        self._bytes = 0
+        self._task: Optional[asyncio.Task] = None
+        self._sweep: Optional[asyncio.Task] = None
+
+    def path_for(self, image_id: str) -> str:
+        return os.path.join(self.root, image_id[:2], f"{image_id}.jpg")
+
+    def exists(self, image_id: str) -> bool:
+        return bool(_IMAGE_ID_RE.match(image_id)) and os.path.exists(self.path_for(image_id))
+
+    async def save_upload(self, upload: UploadFile) -> dict:
+        """Store an uploaded image; raises ImageTooLarge or ValueError for bad input."""
+        raw_path, digest = await spool_upload(upload, self.max_bytes)
+        image_id = digest[:32]
+        path = self.path_for(image_id)
+        stored, created = await asyncio.to_thread(self._store, raw_path, path, image_id)
+        if created:
+            self._bytes += stored["bytes"]
+            if self._bytes > self.max_total_bytes and (self._sweep is None or self._sweep.done()):
+                self._sweep = asyncio.create_task(asyncio.to_thread(self.sweep))
+        return stored
+
+    def _store(self, raw_path: str, path: str, image_id: str) -> Tuple[dict, bool]:
+        try:
+            created = not os.path.exists(path)
+            if created:
+                img = _open_rgb(raw_path)
+                img.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+                _save_jpeg(img, path, self.quality)
+            else:
+                os.utime(path)
+        finally:
+            os.unlink(raw_path)
+        width, height = self._dimensions(path)
+        return {"image_id": image_id, "width": width, "height": height, "bytes": os.path.getsize(path)}, created
+
+    def _dimensions(self, path: str):
+        with Image.open(path) as img:
+            return img.size
+
+    async def load_data_url(self, image_id: str) -> Optional[str]:
+        if not self.exists(image_id):
+            return None
+        try:
+            data = await asyncio.to_thread(self._read, self.path_for(image_id))
+        except FileNotFoundError:
+            # Swept between the existence check and the read
+            return None
+        return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+
+    def _read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+        return data
+
+    def _images(self) -> List[Tuple[float, int, str]]:
+        images = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(".jpg"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                images.append((st.st_mtime, st.st_size, path))
+        return images
+
+    def sweep(self) -> int:
+        """Delete expired images, then the least recently used until under the byte cap; returns the count."""
+        cutoff = time.time() - self.retention_seconds
+        images = sorted(self._images())
+        total = sum(size for _, size, _ in images)
+        removed = 0
+        # Oldest first, so once one is fresh and the total fits, the rest are kept too
+        for mtime, size, path in images:
+            if mtime >= cutoff and total <= self.max_total_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._bytes = total
+        self.swept += removed
+        return removed
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                removed = await asyncio.to_thread(self.sweep)
+                if removed:
+                    print(f"Chat image sweep removed {removed} image(s); {self._bytes} bytes kept")
+            except Exception as e:
+                print(f"Chat image sweep failed: {e!r}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class AvatarStore:
+    """
+    Content-addressed profile pictures with pre-sized square thumbnails.
+
+    An avatar is stored as ``{id}.jpg`` (at most AVATAR_MAX_SIDE pixels) plus a
+    ``{id}_{size}.jpg`` centre crop for each of AVATAR_SIZES, where the id comes
+    from the uploaded bytes. Users uploading the same picture share one set of
+    files, so replaced avatars are left on disk rather than deleted.
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_side: int, sizes: List[int], quality: int):
+        self.max_bytes = max_bytes
+        self.max_side = max_side
+        self.sizes = sorted(sizes)
+        self.quality = quality
+        self.root = _writable_root(root)
+
+    def _name(self, avatar_id: str, size: Optional[int] = None) -> str:
+        return f"{avatar_id}_{size}.jpg" if size else f"{avatar_id}.jpg"
+
+    def url_for(self, avatar_id: str, size: Optional[int] = None) -> str:
+        # The /uploads static mount serves this directory whether or not it fell back to /tmp
+        return f"/uploads/profiles/{self._name(avatar_id, size)}"
+
+    async def save_upload(self, upload: UploadFile) -> str:
+        """Store an uploaded avatar and return its id; raises ImageTooLarge or ValueError."""
+        raw_path, digest = await spool_upload(upload, self.max_bytes)
+        avatar_id = digest[:32]
+        await asyncio.to_thread(self._store, raw_path, avatar_id)
+        return avatar_id
+
+    def _store(self, raw_path: str, avatar_id: str) -> None:
+        try:
+            names = [self._name(avatar_id)] + [self._name(avatar_id, size) for size in self.sizes]
+            if all(os.path.exists(os.path.join(self.root, name)) for name in names):
+                return
+            img = _open_rgb(raw_path)
+            for size in self.sizes:
+                thumb = ImageOps.fit(img, (size, size), Image.LANCZOS)
+                _save_jpeg(thumb, os.path.join(self.root, self._name(avatar_id, size)), self.quality)
+            img.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+            _save_jpeg(img, os.path.join(self.root, self._name(avatar_id)), self.quality)
+        finally:
+            os.unlink(raw_path)
+
+
+chat_images = ChatImageStore(
+    settings.CHAT_IMAGE_DIR,
+    settings.CHAT_IMAGE_MAX_UPLOAD_BYTES,
+    settings.CHAT_IMAGE_MAX_SIDE,
+    settings.CHAT_IMAGE_QUALITY,
+    settings.CHAT_IMAGE_RETENTION_SECONDS,
+    settings.CHAT_IMAGE_MAX_TOTAL_BYTES,
+)
+
+avatars = AvatarStore(
+    "uploads/profiles",
+    settings.AVATAR_MAX_UPLOAD_BYTES,
+    settings.AVATAR_MAX_SIDE,
+    [int(size) for size in settings.AVATAR_SIZES.split(",") if size.strip()],
+    settings.AVATAR_QUALITY,
+)
@@ -0,0 +1,113 @@
+import asyncio
+import datetime
+from typing import List, Optional
+
+from beanie import PydanticObjectId
+
+from app.core.ai_service import AIService
+from app.core.config import settings
+from app.models.base_models import VideoJob, VideoJobStatus
+
+ACTIVE_STATUSES = [VideoJobStatus.QUEUED, VideoJobStatus.SUBMITTED, VideoJobStatus.IN_PROGRESS]
+
+
+class VideoJobRunner:
+    """
+    Bounded pool of workers that drive fal.ai video jobs to completion.
+
+    Job state lives in the ``video_jobs`` collection, so the HTTP request returns
+    as soon as the job is recorded. On startup every job still in an active state
+    is re-enqueued; jobs that already have a fal.ai request id resume polling
+    instead of being submitted twice.
+    """
+
+    def __init__(self):
+        self.queue: "asyncio.Queue[PydanticObjectId]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self, workers: int) -> None:
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(max(1, workers))]
+        pending = await VideoJob.find({"status": {"$in": [s.value for s in ACTIVE_STATUSES]}}).sort("created_at").to_list()
+        for job in pending:
+            self.queue.put_nowait(job.id)
+        if pending:
+            print(f"Resuming {len(pending)} video job(s)")
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, prompt: str) -> VideoJob:
+        job = VideoJob(prompt=prompt)
+        await job.insert()
+        self.queue.put_nowait(job.id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                job = await VideoJob.get(job_id)
+                if job is not None and job.status in ACTIVE_STATUSES:
+                    await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Video job {job_id} crashed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _update(self, job: VideoJob, **fields) -> None:
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.datetime.utcnow()
+        await job.save()
+
+    async def _run(self, job: VideoJob) -> None:
+        try:
+            if not job.fal_request_id:
+                submitted = await AIService.submit_video(job.prompt)
+                await self._update(
+                    job,
+                    status=VideoJobStatus.SUBMITTED,
+                    fal_request_id=submitted["request_id"],
+                    status_url=submitted["status_url"],
+                    response_url=submitted["response_url"],
+                    submitted_at=datetime.datetime.utcnow(),
+                )
+                print(f"fal.ai job submitted: {job.fal_request_id}")
+
+            deadline = (job.submitted_at or job.created_at) + datetime.timedelta(seconds=settings.VIDEO_JOB_TIMEOUT_SECONDS)
+            while True:
+                await asyncio.sleep(settings.VIDEO_POLL_INTERVAL_SECONDS)
+                status_data = await AIService.get_video_status(job.status_url)
+                status = status_data.get("status", "").upper()
+
+                if status == "COMPLETED":
+                    break
+                if status in ("FAILED", "CANCELLED"):
+                    raise ValueError(f"fal.ai job {status}: {status_data}")
+                if status in ("IN_QUEUE", "IN_PROGRESS"):
+                    position: Optional[int] = status_data.get("queue_position")
+                    # Only write when something observable changed
+                    if job.status != VideoJobStatus.IN_PROGRESS or job.queue_position != position:
+                        await self._update(job, status=VideoJobStatus.IN_PROGRESS, queue_position=position)
+                if datetime.datetime.utcnow() > deadline:
+                    raise ValueError(f"Video generation timed out after {settings.VIDEO_JOB_TIMEOUT_SECONDS} seconds.")
+
+            video_url = await AIService.get_video_result(job.response_url)
+            await self._update(job, status=VideoJobStatus.COMPLETED, video_url=video_url, queue_position=None)
+            print(f"Video generated successfully: {video_url}")
+        except asyncio.CancelledError:
+            # Shutdown: leave the job active so it resumes on the next start
+            raise
+        except Exception as e:
+            print(f"Error in video job {job.id}: {e}")
+            await self._update(job, status=VideoJobStatus.FAILED, error=f"Video generation failed: {str(e)}")
+
+
+video_jobs = VideoJobRunner()
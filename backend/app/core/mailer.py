@@ -0,0 +1,238 @@
+import asyncio
+import queue
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.models.base_models import MailDeadLetter
+
+
+class MailQueueFull(Exception):
+    pass
+
+
+class OutboundMail:
+    __slots__ = ("to_email", "subject", "html_body", "attempts", "queued_at")
+
+    def __init__(self, to_email: str, subject: str, html_body: str):
+        self.to_email = to_email
+        self.subject = subject
+        self.html_body = html_body
+        self.attempts = 0
+        self.queued_at = time.monotonic()
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies (bad recipient, rejected sender, auth failure) will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and code >= 500
+
+
+class SMTPSession:
+    """
+    One authenticated SMTP connection, owned by a single worker thread.
+
+    Connects lazily, probes with NOOP after SMTP_IDLE_SECONDS of silence, and if
+    the server has dropped the connection mid-send it reconnects and tries once
+    more before reporting the failure.
+    """
+
+    def __init__(self, on_connect=None):
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._on_connect = on_connect
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            server.ehlo()
+            if settings.SMTP_STARTTLS:
+                server.starttls()
+                server.ehlo()
+            if settings.SMTP_USER and settings.SMTP_PASSWORD:
+                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        if self._on_connect is not None:
+            self._on_connect()
+        return server
+
+    def _alive(self) -> bool:
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, sender: str, to_email: str, message: str) -> None:
+        if self._server is not None and time.monotonic() - self._last_used > settings.SMTP_IDLE_SECONDS:
+            if not self._alive():
+                self.close()
+        for reconnect in (False, True):
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.sendmail(sender, to_email, message)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if reconnect:
+                    raise
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # The server answered, so the session itself is still usable
+                try:
+                    self._server.rset()
+                except (smtplib.SMTPException, OSError):
+                    self.close()
+                raise
+            except Exception:
+                self.close()
+                raise
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+class Mailer:
+    """
+    Background outbound mail queue.
+
+    ``enqueue`` only appends to an in-memory queue, so request handlers return
+    without touching SMTP. MAIL_WORKERS threads each keep one SMTP session open
+    and reuse it across messages. Transient failures are retried with
+    exponential backoff; permanent ones, and messages that exhaust
+    MAIL_MAX_ATTEMPTS, are written to ``mail_dead_letters``. Messages still
+    queued at shutdown are delivered before the workers exit.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[OutboundMail]]" = queue.Queue(maxsize=settings.MAIL_QUEUE_MAX)
+        self._threads: List[threading.Thread] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {"enqueued": 0, "sent": 0, "retried": 0, "dead_lettered": 0, "connections": 0}
+
+    @property
+    def sender(self) -> str:
+        return settings.SMTP_USER or settings.EMAIL_FROM
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def start(self, workers: int) -> None:
+        if self._threads:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"mailer-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if not self._threads:
+            return
+        threads, self._threads = self._threads, []
+
+        def drain():
+            # Sentinels queue up behind pending mail, so that mail still goes out
+            for _ in threads:
+                self._queue.put(None)
+            deadline = time.monotonic() + timeout
+            for thread in threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+            # Cut short any backoff sleeps that outlived the drain window
+            self._stopping.set()
+            for thread in threads:
+                thread.join(1.0)
+
+        await asyncio.to_thread(drain)
+
+    def enqueue(self, to_email: str, subject: str, html_body: str) -> None:
+        try:
+            self._queue.put_nowait(OutboundMail(to_email, subject, html_body))
+        except queue.Full:
+            raise MailQueueFull("Outbound mail queue is full")
+        self._count("enqueued")
+
+    def _render(self, mail: OutboundMail) -> str:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = mail.subject
+        msg["From"] = f"AI Era Academy <{self.sender}>"
+        msg["To"] = mail.to_email
+        msg.attach(MIMEText(mail.html_body, "html"))
+        return msg.as_string()
+
+    def _worker(self) -> None:
+        session = SMTPSession(on_connect=lambda: self._count("connections"))
+        try:
+            while True:
+                mail = self._queue.get()
+                try:
+                    if mail is None:
+                        return
+                    self._deliver(session, mail)
+                finally:
+                    self._queue.task_done()
+        finally:
+            session.close()
+
+    def _deliver(self, session: SMTPSession, mail: OutboundMail) -> None:
+        message = self._render(mail)
+        while True:
+            mail.attempts += 1
+            try:
+                session.send(self.sender, mail.to_email, message)
+                self._count("sent")
+                return
+            except Exception as e:
+                error = e
+            if _is_permanent(error) or mail.attempts >= settings.MAIL_MAX_ATTEMPTS:
+                break
+            self._count("retried")
+            delay = settings.MAIL_RETRY_BASE_SECONDS * 2 ** (mail.attempts - 1)
+            print(f"Mail to {mail.to_email} failed (attempt {mail.attempts}), retrying in {delay:.0f}s: {error}")
+            if self._stopping.wait(delay):
+                break
+        self._dead_letter(mail, error)
+
+    def _dead_letter(self, mail: OutboundMail, error: Exception) -> None:
+        self._count("dead_lettered")
+        print(f"Mail to {mail.to_email} dead-lettered after {mail.attempts} attempt(s): {error}")
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            record = MailDeadLetter(
+                to_email=mail.to_email,
+                subject=mail.subject,
+                html_body=mail.html_body,
+                attempts=mail.attempts,
+                error=f"{type(error).__name__}: {error}",
+            )
+            asyncio.run_coroutine_threadsafe(record.insert(), self._loop).result(timeout=10)
+        except Exception as e:
+            print(f"Could not record dead letter for {mail.to_email}: {e!r}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "queued": self._queue.qsize(), "workers": len(self._threads)}
+
+
+mailer = Mailer()
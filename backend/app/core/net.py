@@ -0,0 +1,38 @@
+import ipaddress
+from functools import lru_cache
+from typing import List
+
+from fastapi import Request
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=4)
+def _networks(spec: str) -> List[ipaddress._BaseNetwork]:
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip()]
+
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _networks(settings.TRUSTED_PROXIES))
+
+
+def client_ip(request: Request) -> str:
+    """
+    The address rate limits and fair queueing should key on.
+
+    X-Forwarded-For is only believed when the direct peer is in TRUSTED_PROXIES.
+    The header is then read right to left, skipping trusted hops, so a client
+    cannot spoof its address by sending its own header through the proxy.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _trusted(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop):
+            return hop
+    return hops[0] if hops else peer
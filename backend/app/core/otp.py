@@ -0,0 +1,121 @@
+import datetime
+import hmac
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.email import generate_otp
+from app.models.base_models import OTPRecord
+
+MAX_TRACKED_IPS = 10_000
+
+
+class SlidingWindowLimiter:
+    """
+    In-process sliding-window log: at most ``limit`` events per key per ``window``
+    seconds. Memory is bounded by tracking only the most recent MAX_TRACKED_IPS keys.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._events: "OrderedDict[str, Deque[float]]" = OrderedDict()
+
+    def hit(self, key: str) -> Optional[int]:
+        """Record an event; return seconds to wait instead if the key is over its limit."""
+        now = time.monotonic()
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque()
+        self._events.move_to_end(key)
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if len(events) >= self.limit:
+            return max(1, int(events[0] + self.window - now) + 1)
+        events.append(now)
+        while len(self._events) > MAX_TRACKED_IPS:
+            self._events.popitem(last=False)
+        return None
+
+
+class OTPRejected(Exception):
+    def __init__(self, detail: str, status_code: int = 400, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+ip_send_limiter = SlidingWindowLimiter(settings.OTP_MAX_SENDS_PER_IP, settings.OTP_SEND_WINDOW_SECONDS)
+
+
+async def issue_otp(email: str, purpose: str, client_ip: str) -> str:
+    """
+    Create or replace the OTP for (email, purpose) in one atomic upsert.
+
+    The record carries its own sliding window of send times, so the per-email cap
+    is checked and applied by the same update that rotates the code: there is no
+    separate read, and concurrent requests cannot both slip under the limit.
+    """
+    retry_after = ip_send_limiter.hit(client_ip)
+    if retry_after is not None:
+        raise OTPRejected("Too many OTP requests. Please try again later.", 429, retry_after)
+
+    now = datetime.datetime.utcnow()
+    window_start = now - datetime.timedelta(seconds=settings.OTP_SEND_WINDOW_SECONDS)
+    otp = generate_otp()
+    pipeline = [
+        {"$set": {"sends": {"$filter": {
+            "input": {"$ifNull": ["$sends", []]}, "as": "t", "cond": {"$gt": ["$$t", window_start]},
+        }}}},
+        {"$set": {"throttled": {"$gte": [{"$size": "$sends"}, settings.OTP_MAX_SENDS_PER_EMAIL]}}},
+        {"$set": {
+            "otp": {"$cond": ["$throttled", "$otp", otp]},
+            "attempts": {"$cond": ["$throttled", "$attempts", 0]},
+            "created_at": {"$cond": ["$throttled", "$created_at", now]},
+            "expires_at": {"$cond": ["$throttled", "$expires_at", now + datetime.timedelta(seconds=settings.OTP_TTL_SECONDS)]},
+            "sends": {"$cond": ["$throttled", "$sends", {"$concatArrays": ["$sends", [now]]}]},
+        }},
+    ]
+    record = await OTPRecord.get_motor_collection().find_one_and_update(
+        {"email": email, "purpose": purpose},
+        pipeline,
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    if record["throttled"]:
+        oldest = record["sends"][0]
+        wait = int((oldest - window_start).total_seconds()) + 1
+        raise OTPRejected("Too many codes requested for this email. Please try again later.", 429, max(1, wait))
+    return otp
+
+
+async def consume_otp(email: str, purpose: str, code: str) -> None:
+    """
+    Check a code and delete the record on success; raises OTPRejected otherwise.
+
+    The attempt counter is bumped atomically before comparing, so parallel guesses
+    all count against OTP_MAX_ATTEMPTS.
+    """
+    collection = OTPRecord.get_motor_collection()
+    record = await collection.find_one_and_update(
+        {"email": email, "purpose": purpose},
+        {"$inc": {"attempts": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if record is None or not record.get("otp"):
+        raise OTPRejected("No OTP found. Please request a new one.")
+    # The TTL monitor runs about once a minute, so check expiry here as well
+    if datetime.datetime.utcnow() > record["expires_at"]:
+        raise OTPRejected("OTP has expired. Please request a new one.")
+    if record["attempts"] > settings.OTP_MAX_ATTEMPTS:
+        raise OTPRejected("Too many incorrect attempts. Please request a new code.", 429)
+    if not hmac.compare_digest(record["otp"], code):
+        raise OTPRejected("Invalid OTP. Please try again.")
+    # Conditional on the code so a concurrent resend is not consumed by accident
+    result = await collection.delete_one({"_id": record["_id"], "otp": record["otp"]})
+    if result.deleted_count == 0:
+        raise OTPRejected("OTP is no longer valid. Please request a new one.")
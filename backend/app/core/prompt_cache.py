@@ -0,0 +1,106 @@
+import datetime
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.models.base_models import PromptCacheEntry
+
+_WS_RE = re.compile(r"\s+")
+
+
+def prompt_key(model: str, system_prompt: str, prompt: str, response_format: Optional[dict] = None) -> str:
+    """Hash of the normalized request; whitespace-only differences share an entry."""
+    payload = json.dumps({
+        "model": model,
+        "system": _WS_RE.sub(" ", system_prompt).strip(),
+        "prompt": _WS_RE.sub(" ", prompt).strip(),
+        "response_format": response_format,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """
+    Two-tier cache of LLM completions: an in-process LRU in front of a MongoDB
+    collection whose TTL index expires old entries. The Mongo tier is best-effort —
+    if it is unavailable, requests fall through to the model.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def _remember(self, key: str, content: str, total_tokens: int, stored_at: float) -> None:
+        self._memory[key] = (stored_at, content, total_tokens)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._memory.get(key)
+        if item is not None:
+            stored_at, content, total_tokens = item
+            if time.time() - stored_at < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.tokens_saved += total_tokens
+                return content
+            del self._memory[key]
+
+        try:
+            entry = await PromptCacheEntry.find_one(PromptCacheEntry.key == key)
+        except Exception as e:
+            print(f"Prompt cache lookup failed: {e}")
+            entry = None
+        # The TTL monitor runs about once a minute, so re-check expiry here.
+        # created_at is naive UTC; compare it with utcnow, never with local time.
+        if entry is not None:
+            age = (datetime.datetime.utcnow() - entry.created_at).total_seconds()
+            if age < self.ttl_seconds:
+                self.db_hits += 1
+                self.tokens_saved += entry.total_tokens
+                self._remember(key, entry.content, entry.total_tokens, time.time() - age)
+                return entry.content
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, model: str, content: str, total_tokens: int = 0) -> None:
+        self._remember(key, content, total_tokens, time.time())
+        try:
+            await PromptCacheEntry.get_motor_collection().update_one(
+                {"key": key},
+                {"$set": {
+                    "model": model,
+                    "content": content,
+                    "total_tokens": total_tokens,
+                    "created_at": datetime.datetime.utcnow(),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"Prompt cache store failed: {e}")
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.db_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "memory_entries": len(self._memory),
+        }
+
+
+prompt_cache = PromptCache(settings.PROMPT_CACHE_MAX_ENTRIES, settings.PROMPT_CACHE_TTL_SECONDS)
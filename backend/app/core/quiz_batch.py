@@ -0,0 +1,244 @@
+import asyncio
+import datetime
+import hashlib
+import random
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import DeleteMany, UpdateOne
+
+from app.core.admission import admission, AdmissionRejected
+from app.core.ai_service import AIService, QUIZ_MODEL
+from app.core.config import settings
+from app.models.base_models import Blog, Quiz, QuizBatchRun, QuizBatchStatus
+
+# Blogs fetched, generated and checkpointed together
+PAGE_SIZE = 20
+# Upper bound on chunks (and therefore model calls) per blog
+MAX_CHUNKS = 8
+RETRY_BASE_SECONDS = 2.0
+MAX_RECORDED_ERRORS = 100
+# Admission key shared by every batch call, so the batch is one fair-queued caller among users
+ADMISSION_KEY = "quiz_batch"
+# Times a chunk may be turned away by admission before its blog is marked failed
+MAX_ADMISSION_REJECTIONS = 20
+QUIZ_DIFFICULTY = "intermediate"
+
+
+def content_hash(blog: Blog) -> str:
+    return hashlib.sha256(f"{blog.title}\0{blog.content}".encode("utf-8")).hexdigest()
+
+
+def split_content(content: str, max_chars: int) -> List[str]:
+    """Split markdown on paragraph boundaries into chunks of at most ``max_chars``."""
+    chunks: List[str] = []
+    current = ""
+    for paragraph in content.split("\n\n"):
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks[:MAX_CHUNKS]
+
+
+def validate_questions(items) -> List[dict]:
+    """Keep well-formed questions: 4 distinct options and an answer that is one of them."""
+    if not isinstance(items, list):
+        return []
+    valid = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        question, options, answer = item.get("question"), item.get("options"), item.get("answer")
+        if not isinstance(question, str) or not question.strip() or question.startswith("Error:"):
+            continue
+        if not isinstance(options, list) or len(options) != 4 or not all(isinstance(o, str) and o.strip() for o in options):
+            continue
+        if len(set(options)) != 4 or answer not in options:
+            continue
+        valid.append({"question": question.strip(), "options": options, "answer": answer})
+    return valid
+
+
+class QuizBatchRunner:
+    """
+    Admin-triggered pass over published blogs that (re)generates their quizzes.
+
+    Blogs are read in ``_id`` order a page at a time. Each page's chunks go to the
+    model with at most QUIZ_BATCH_CONCURRENCY calls in flight, each also going
+    through admission control so the batch shares the per-model limits with
+    interactive traffic. Invalid output is retried with exponential backoff,
+    admission rejections after their Retry-After, and the page's quizzes are
+    written in one bulk. The run document is checkpointed after every page, so a restart resumes
+    where it stopped. Blogs whose content hash matches their stored quizzes are
+    skipped unless the run is forced.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, force: bool = False) -> Optional[QuizBatchRun]:
+        """Begin a new run; returns None if one is already in progress."""
+        if self.running:
+            return None
+        run = QuizBatchRun(force=force)
+        await run.insert()
+        self._launch(run)
+        return run
+
+    async def resume(self) -> None:
+        """Pick up a run that was interrupted by a restart."""
+        run = await QuizBatchRun.find({"status": QuizBatchStatus.RUNNING.value}).sort("-started_at").first_or_none()
+        if run is not None and not self.running:
+            print(f"Resuming quiz batch run {run.id} after blog {run.last_blog_id}")
+            self._launch(run)
+
+    async def latest(self) -> Optional[QuizBatchRun]:
+        return await QuizBatchRun.find_all().sort("-started_at").first_or_none()
+
+    def _launch(self, run: QuizBatchRun) -> None:
+        self._semaphore = asyncio.Semaphore(max(1, settings.QUIZ_BATCH_CONCURRENCY))
+        self._task = asyncio.create_task(self._run(run))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, run: QuizBatchRun) -> None:
+        try:
+            while True:
+                query: Dict = {"is_published": True}
+                if run.last_blog_id is not None:
+                    query["_id"] = {"$gt": run.last_blog_id}
+                page = await Blog.find(query).sort("_id").limit(PAGE_SIZE).to_list()
+                if not page:
+                    break
+                await self._process_page(run, page)
+            run.status = QuizBatchStatus.COMPLETED
+            run.finished_at = datetime.datetime.utcnow()
+            await self._save(run)
+            print(f"Quiz batch run {run.id} completed: {run.quizzes_written} quizzes written")
+        except asyncio.CancelledError:
+            # Shutdown: leave the run RUNNING so it resumes from the checkpoint
+            raise
+        except Exception as e:
+            print(f"Quiz batch run {run.id} failed: {e}")
+            run.status = QuizBatchStatus.FAILED
+            run.error = str(e)
+            run.finished_at = datetime.datetime.utcnow()
+            await self._save(run)
+
+    async def _save(self, run: QuizBatchRun) -> None:
+        run.updated_at = datetime.datetime.utcnow()
+        await run.save()
+
+    async def _stored_hashes(self, blogs: List[Blog]) -> Dict[str, str]:
+        cursor = Quiz.get_motor_collection().find(
+            {"blog_id": {"$in": [str(b.id) for b in blogs]}, "chunk": 0},
+            {"blog_id": 1, "content_hash": 1},
+        )
+        return {row["blog_id"]: row.get("content_hash") async for row in cursor}
+
+    async def _process_page(self, run: QuizBatchRun, page: List[Blog]) -> None:
+        stored = await self._stored_hashes(page) if not run.force else {}
+        results = await asyncio.gather(*(self._process_blog(blog, stored.get(str(blog.id))) for blog in page))
+
+        ops = []
+        for blog, (outcome, blog_ops, error) in zip(page, results):
+            run.blogs_processed += 1
+            if outcome == "skipped":
+                run.blogs_skipped += 1
+            elif outcome == "failed":
+                run.blogs_failed += 1
+                if len(run.errors) < MAX_RECORDED_ERRORS:
+                    run.errors.append({"slug": blog.slug, "error": error})
+            else:
+                ops.extend(blog_ops)
+                run.quizzes_written += sum(1 for op in blog_ops if isinstance(op, UpdateOne))
+        if ops:
+            await Quiz.get_motor_collection().bulk_write(ops, ordered=True)
+        run.last_blog_id = page[-1].id
+        await self._save(run)
+
+    async def _process_blog(self, blog: Blog, stored_hash: Optional[str]) -> Tuple[str, list, Optional[str]]:
+        digest = content_hash(blog)
+        if stored_hash == digest:
+            return "skipped", [], None
+        chunks = split_content(blog.content, settings.QUIZ_CHUNK_CHARS)
+        if not chunks:
+            return "skipped", [], None
+        generated = await asyncio.gather(*(self._generate(chunk) for chunk in chunks))
+        errors = [error for _, error in generated if error]
+        if errors:
+            # Keep the previous quizzes rather than writing a partial set
+            return "failed", [], errors[0]
+        questions = [items for items, _ in generated]
+
+        blog_id = str(blog.id)
+        now = datetime.datetime.utcnow()
+        ops: list = []
+        for i, items in enumerate(questions):
+            title = f"{blog.title} Quiz" if len(chunks) == 1 else f"{blog.title} Quiz (Part {i + 1})"
+            ops.append(UpdateOne(
+                {"blog_id": blog_id, "chunk": i},
+                {
+                    "$set": {
+                        "title": title,
+                        "questions": items,
+                        "difficulty": QUIZ_DIFFICULTY,
+                        "blog_slug": blog.slug,
+                        "content_hash": digest,
+                    },
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+            ))
+        # The post may have shrunk to fewer chunks than last time
+        ops.append(DeleteMany({"blog_id": blog_id, "chunk": {"$gte": len(chunks)}}))
+        return "generated", ops, None
+
+    async def _generate(self, chunk: str) -> Tuple[Optional[List[dict]], Optional[str]]:
+        """Valid questions for one chunk, or None and the reason it failed."""
+        attempt = 0
+        rejections = 0
+        while attempt < settings.QUIZ_MAX_ATTEMPTS:
+            try:
+                async with self._semaphore:
+                    # The semaphore already paces the batch, so only the shared concurrency limits apply
+                    async with admission.slot(ADMISSION_KEY, QUIZ_MODEL, rate_limited=False):
+                        # Retries bypass the prompt cache so an answer validate_questions rejected is not replayed
+                        items = await AIService.generate_quiz(chunk, force_refresh=attempt > 0)
+            except AdmissionRejected as e:
+                # Queue full or timed out behind interactive traffic; wait and retry without spending an attempt
+                rejections += 1
+                if rejections >= MAX_ADMISSION_REJECTIONS:
+                    return None, f"Admission rejected {rejections} times ({e.reason})"
+                await asyncio.sleep(e.retry_after * (1 + random.random()))
+                continue
+            valid = validate_questions(items)
+            if valid:
+                return valid, None
+            attempt += 1
+            if attempt < settings.QUIZ_MAX_ATTEMPTS:
+                await asyncio.sleep(RETRY_BASE_SECONDS * 2 ** (attempt - 1) * (0.5 + random.random()))
+        return None, f"No valid quiz after {settings.QUIZ_MAX_ATTEMPTS} attempts"
+
+
+quiz_batch = QuizBatchRunner()
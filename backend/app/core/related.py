@@ -0,0 +1,133 @@
+import math
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.search import tokenize, FIELD_WEIGHTS
+
+# Hashed feature space keeps the matrix width fixed as the vocabulary grows
+FEATURE_DIM = 4096
+
+
+def _feature(term: str, dim: int = FEATURE_DIM) -> int:
+    return zlib.crc32(term.encode("utf-8")) % dim
+
+
+class RelatedIndex:
+    """
+    TF-IDF "related posts" over a compact float32 matrix.
+
+    Each blog is one row of log-scaled, field-weighted term frequencies in a hashed
+    feature space. Rows are appended/removed incrementally; the IDF-weighted,
+    L2-normalised matrix is derived lazily once per corpus version, and a lookup is
+    a single matrix-vector product. Results are cached per slug until the next write.
+    """
+
+    def __init__(self, dim: int = FEATURE_DIM):
+        self.dim = dim
+        self.tf = np.zeros((0, dim), dtype=np.float32)
+        self.df = np.zeros(dim, dtype=np.float32)
+        self.meta: List[dict] = []
+        self.row_of: Dict[str, int] = {}
+        self.version = 0
+        self._weighted: Optional[np.ndarray] = None
+        self._cache: Dict[Tuple[str, int], List[dict]] = {}
+
+    def __len__(self):
+        return len(self.meta)
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._weighted = None
+        self._cache.clear()
+
+    def clear(self) -> None:
+        self.tf = np.zeros((0, self.dim), dtype=np.float32)
+        self.df[:] = 0
+        self.meta.clear()
+        self.row_of.clear()
+        self._changed()
+
+    def _vectorize(self, blog) -> np.ndarray:
+        weighted: Counter = Counter()
+        fields = {"title": blog.title, "tags": " ".join(blog.tags or []), "content": blog.content}
+        for field, text in fields.items():
+            for term in tokenize(text or ""):
+                weighted[_feature(term, self.dim)] += FIELD_WEIGHTS[field]
+        row = np.zeros(self.dim, dtype=np.float32)
+        if weighted:
+            idx = np.fromiter(weighted.keys(), dtype=np.int64, count=len(weighted))
+            val = np.fromiter(weighted.values(), dtype=np.float32, count=len(weighted))
+            row[idx] = 1.0 + np.log(val)
+        return row
+
+    def add(self, blog) -> None:
+        if blog.slug in self.row_of:
+            self.remove(blog.slug)
+        row = self._vectorize(blog)
+        n = len(self.meta)
+        if n == self.tf.shape[0]:
+            # Grow capacity geometrically so inserts stay amortised O(1) rows copied
+            grown = np.zeros((max(16, n * 2), self.dim), dtype=np.float32)
+            grown[:n] = self.tf[:n]
+            self.tf = grown
+        self.tf[n] = row
+        self.df += row > 0
+        self.meta.append({"id": str(blog.id), "slug": blog.slug, "title": blog.title, "category": blog.category})
+        self.row_of[blog.slug] = n
+        self._changed()
+
+    def remove(self, slug: str) -> None:
+        i = self.row_of.pop(slug, None)
+        if i is None:
+            return
+        self.df -= self.tf[i] > 0
+        last = len(self.meta) - 1
+        if i != last:
+            # Swap-remove keeps live rows contiguous
+            self.tf[i] = self.tf[last]
+            self.meta[i] = self.meta[last]
+            self.row_of[self.meta[i]["slug"]] = i
+        self.tf[last] = 0
+        self.meta.pop()
+        self._changed()
+
+    def _weighted_matrix(self) -> np.ndarray:
+        if self._weighted is None:
+            n = len(self.meta)
+            idf = np.log((1 + n) / (1 + self.df)).astype(np.float32) + 1.0
+            weighted = self.tf[:n] * idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._weighted = weighted / norms
+        return self._weighted
+
+    def related(self, slug: str, k: int = 5) -> Optional[List[dict]]:
+        i = self.row_of.get(slug)
+        if i is None:
+            return None
+        key = (slug, k)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        matrix = self._weighted_matrix()
+        scores = matrix @ matrix[i]
+        scores[i] = -math.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            result = []
+        else:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            result = [
+                {**self.meta[j], "score": round(float(scores[j]), 4)}
+                for j in top if scores[j] > 0
+            ]
+        self._cache[key] = result
+        return result
+
+
+related_index = RelatedIndex()
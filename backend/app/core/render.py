@@ -0,0 +1,65 @@
+import math
+import re
+from typing import Any, Dict, List
+
+import markdown
+import nh3
+
+WORDS_PER_MINUTE = 200
+
+_FENCED_CODE_RE = re.compile(r"```.*?```", re.DOTALL)
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9'\-]*")
+
+ALLOWED_TAGS = {
+    "a", "abbr", "b", "blockquote", "br", "code", "del", "em", "h1", "h2", "h3", "h4", "h5", "h6",
+    "hr", "i", "img", "li", "ol", "p", "pre", "span", "strong", "sub", "sup", "table", "tbody",
+    "td", "th", "thead", "tr", "ul",
+}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "img": {"src", "alt", "title"},
+    "code": {"class"},
+    "pre": {"class"},
+    "span": {"class"},
+    "th": {"align"},
+    "td": {"align"},
+    **{f"h{n}": {"id"} for n in range(1, 7)},
+}
+
+
+def _flatten_toc(tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    flat = []
+    for tok in tokens:
+        flat.append({"level": tok["level"], "id": tok["id"], "title": tok["name"]})
+        flat.extend(_flatten_toc(tok.get("children", [])))
+    return flat
+
+
+def count_words(content: str) -> int:
+    """Prose words only — fenced code and Mermaid blocks do not count towards reading time."""
+    return len(_WORD_RE.findall(_FENCED_CODE_RE.sub(" ", content)))
+
+
+def render_markdown(content: str) -> Dict[str, Any]:
+    """
+    Render blog Markdown once at write time.
+
+    Returns sanitized HTML, a flat heading table of contents, word count and reading
+    time in minutes. Fenced ``mermaid`` blocks are kept as ``code.language-mermaid``
+    so the client can hand them to Mermaid.js untouched.
+    """
+    md = markdown.Markdown(extensions=["fenced_code", "tables", "sane_lists", "toc"])
+    raw_html = md.convert(content or "")
+    safe_html = nh3.clean(
+        raw_html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes={"http", "https", "mailto"},
+    )
+    words = count_words(content or "")
+    return {
+        "content_html": safe_html,
+        "toc": _flatten_toc(getattr(md, "toc_tokens", [])),
+        "word_count": words,
+        "reading_time": max(1, math.ceil(words / WORDS_PER_MINUTE)) if words else 0,
+    }
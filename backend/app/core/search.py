@@ -0,0 +1,172 @@
+import bisect
+import html
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MARKDOWN_RE = re.compile(r"[#*_`>\[\]|~]+")
+_WS_RE = re.compile(r"\s+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to was what when with you your".split()
+)
+
+# Field weights folded into a single weighted term frequency (BM25F-style)
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "content": 1.0}
+MAX_PREFIX_EXPANSIONS = 20
+SNIPPET_CHARS = 180
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over blog title, tags and content with BM25 ranking.
+
+    Postings map term -> {doc_id: weighted tf}. A sorted term list backs prefix
+    expansion for autocomplete, so queries never touch MongoDB.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.doc_len: Dict[str, float] = {}
+        self.docs: Dict[str, dict] = {}
+        self.terms: List[str] = []
+        self.total_len = 0.0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def clear(self):
+        self.postings.clear()
+        self.doc_len.clear()
+        self.docs.clear()
+        self.terms.clear()
+        self.total_len = 0.0
+
+    def add(self, blog) -> None:
+        doc_id = str(blog.id)
+        if doc_id in self.docs:
+            self.remove(doc_id)
+
+        weighted: Counter = Counter()
+        fields = {"title": blog.title, "tags": " ".join(blog.tags or []), "content": blog.content}
+        for field, text in fields.items():
+            for term, tf in Counter(tokenize(text or "")).items():
+                weighted[term] += tf * FIELD_WEIGHTS[field]
+
+        for term, wtf in weighted.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                bisect.insort(self.terms, term)
+            postings[doc_id] = wtf
+
+        length = sum(weighted.values())
+        self.doc_len[doc_id] = length
+        self.total_len += length
+        self.docs[doc_id] = {
+            "id": doc_id,
+            "slug": blog.slug,
+            "title": blog.title,
+            "category": blog.category,
+            "content": blog.content or "",
+            "terms": list(weighted),
+        }
+
+    def remove(self, doc_id: str) -> None:
+        doc = self.docs.pop(str(doc_id), None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc["id"], None)
+            if not postings:
+                del self.postings[term]
+                i = bisect.bisect_left(self.terms, term)
+                if i < len(self.terms) and self.terms[i] == term:
+                    self.terms.pop(i)
+        self.total_len -= self.doc_len.pop(doc["id"], 0.0)
+
+    def expand_prefix(self, prefix: str, limit: int = MAX_PREFIX_EXPANSIONS) -> List[str]:
+        i = bisect.bisect_left(self.terms, prefix)
+        out = []
+        while i < len(self.terms) and self.terms[i].startswith(prefix) and len(out) < limit:
+            out.append(self.terms[i])
+            i += 1
+        return out
+
+    def _idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        n = len(self.docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 10, prefix: bool = True) -> List[dict]:
+        q_terms = tokenize(query)
+        if not q_terms or not self.docs:
+            return []
+
+        # The last token is still being typed: expand it over the term dictionary
+        expanded: Dict[str, float] = {t: 1.0 for t in q_terms}
+        if prefix:
+            for term in self.expand_prefix(q_terms[-1]):
+                expanded.setdefault(term, 0.8)
+
+        avgdl = self.total_len / len(self.docs) or 1.0
+        scores: Dict[str, float] = {}
+        matched: Dict[str, set] = {}
+        for term, boost in expanded.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term) * boost
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched.setdefault(doc_id, set()).add(term)
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        results = []
+        for doc_id, score in ranked:
+            doc = self.docs[doc_id]
+            results.append({
+                "id": doc_id,
+                "slug": doc["slug"],
+                "title": doc["title"],
+                "category": doc["category"],
+                "score": round(score, 4),
+                "snippet": make_snippet(doc["content"], matched[doc_id]),
+            })
+        return results
+
+
+def make_snippet(content: str, terms, width: int = SNIPPET_CHARS) -> str:
+    """Return an HTML-escaped excerpt around the first match with terms wrapped in <mark>."""
+    text = _WS_RE.sub(" ", _MARKDOWN_RE.sub(" ", content)).strip()
+    if not terms:
+        return html.escape(text[:width])
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + r")", re.IGNORECASE)
+    m = pattern.search(text)
+    start = max(0, m.start() - width // 3) if m else 0
+    excerpt = text[start:start + width]
+    parts, pos = [], 0
+    for mm in pattern.finditer(excerpt):
+        parts.append(html.escape(excerpt[pos:mm.start()]))
+        parts.append(f"<mark>{html.escape(mm.group(0))}</mark>")
+        pos = mm.end()
+    parts.append(html.escape(excerpt[pos:]))
+    highlighted = "".join(parts)
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + width < len(text) else ""
+    return f"{prefix}{highlighted}{suffix}"
+
+
+search_index = SearchIndex()
@@ -0,0 +1,65 @@
+import asyncio
+from collections import Counter
+from typing import Optional
+
+from pymongo import UpdateOne
+
+from app.models.base_models import Blog
+
+
+class ViewCounter:
+    """
+    Write-behind page-view counter.
+
+    ``hit()`` only bumps an in-memory Counter; ``flush()`` turns the accumulated
+    counts into one unordered bulk of ``$inc`` updates keyed by slug. Counts are
+    merged back if the write fails so views are never dropped silently.
+    """
+
+    def __init__(self):
+        self.pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def hit(self, slug: str, n: int = 1) -> None:
+        self.pending[slug] += n
+
+    def pending_for(self, slug: str) -> int:
+        return self.pending.get(slug, 0)
+
+    def pending_total(self) -> int:
+        return sum(self.pending.values())
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+        batch, self.pending = self.pending, Counter()
+        ops = [UpdateOne({"slug": slug}, {"$inc": {"views": n}}) for slug, n in batch.items()]
+        try:
+            await Blog.get_motor_collection().bulk_write(ops, ordered=False)
+        except Exception as e:
+            print(f"View counter flush failed, will retry: {e}")
+            self.pending.update(batch)
+            return 0
+        return len(ops)
+
+    async def _run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self, interval: float) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+view_counter = ViewCounter()
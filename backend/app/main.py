@@ -1,20 +1,43 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 from contextlib import asynccontextmanager
 from app.core.config import settings
+from app.core.views import view_counter
+from app.core.jobs import video_jobs
+from app.core.conversations import conversation_store
+from app.core.quiz_batch import quiz_batch
+from app.core.mailer import mailer
+from app.core.http import close_http_client
+from app.core.images import chat_images
 from app.db.session import init_db
-from app.models.base_models import User, Blog, Quiz, ChatHistory, UserDashboard, ContactMessage, OTPRecord
+from app.models.base_models import User, Blog, Quiz, ChatHistory, UserDashboard, ContactMessage, OTPRecord, PromptCacheEntry, VideoJob, QuizBatchRun, MailDeadLetter
 
-from app.api import auth, blogs, ai, dashboard, contact
+from app.api import auth, blogs, ai, dashboard, contact, feeds
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize Beanie with all document models
-    await init_db([User, Blog, Quiz, ChatHistory, UserDashboard, ContactMessage, OTPRecord])
+    await init_db([User, Blog, Quiz, ChatHistory, UserDashboard, ContactMessage, OTPRecord, PromptCacheEntry, VideoJob, QuizBatchRun, MailDeadLetter])
+    await blogs.init_blog_indexes()
+    view_counter.start(settings.VIEW_FLUSH_INTERVAL_SECONDS)
+    # Also re-enqueues video jobs that were in flight when the last process stopped
+    await video_jobs.start(settings.VIDEO_JOB_WORKERS)
+    await quiz_batch.resume()
+    mailer.start(settings.MAIL_WORKERS)
+    chat_images.start(settings.CHAT_IMAGE_SWEEP_INTERVAL_SECONDS)
     yield
-    # Cleanup if necessary
+    # Persist buffered view counts before the worker goes away
+    await view_counter.stop()
+    await video_jobs.stop()
+    await quiz_batch.stop()
+    await conversation_store.stop()
+    await chat_images.stop()
+    # Sends whatever is still queued before the SMTP sessions close
+    await mailer.stop()
+    await close_http_client()
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
@@ -22,12 +45,16 @@ app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 _raw_origins = os.getenv("ALLOWED_ORIGINS", "*")
 allowed_origins = [o.strip() for o in _raw_origins.split(",")] if _raw_origins != "*" else ["*"]
 
+# On-the-fly gzip for everything else; blog reads ship precompressed variants and pass through untouched
+app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Conversation-Id"],
 )
 
 # Create uploads directory if it doesn't exist. On Vercel, the file system is read-only except for /tmp.
@@ -46,6 +73,7 @@ app.include_router(blogs.router)
 app.include_router(ai.router)
 app.include_router(dashboard.router)
 app.include_router(contact.router)
+app.include_router(feeds.router)
 
 @app.get("/")
 def read_root():
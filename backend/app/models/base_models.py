@@ -1,5 +1,8 @@
-from beanie import Document, Indexed
+from beanie import Document, Indexed, PydanticObjectId, before_event, Insert, Replace, Save, SaveChanges
 from pydantic import Field
+from pymongo import IndexModel, DESCENDING
+from app.core.render import render_markdown
+from app.core.config import settings
 from typing import List, Optional, Any, Dict
 import datetime
 import enum
@@ -31,9 +34,27 @@ class Blog(Document):
     seo_description: Optional[str] = None
     is_published: bool = False
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+    # Rendered once per write by render_content(), never per view
+    content_html: Optional[str] = None
+    toc: List[Dict[str, Any]] = Field(default_factory=list)
+    word_count: int = 0
+    reading_time: int = 0
+    # Incremented only by the write-behind ViewCounter via $inc
+    views: int = 0
+
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def render_content(self):
+        for key, value in render_markdown(self.content).items():
+            setattr(self, key, value)
 
     class Settings:
         name = "blogs"
+        # Keyset pagination walks (created_at, _id) newest-first, optionally within a category
+        indexes = [
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("category", 1), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("views", DESCENDING)]),
+        ]
 
 
 
@@ -42,17 +63,99 @@ class Quiz(Document):
     questions: List[Any] = Field(default_factory=list)
     difficulty: str
     course_id: Optional[str] = None
+    # Set on quizzes generated from a blog post; one quiz per content chunk
+    blog_id: Optional[str] = None
+    blog_slug: Optional[str] = None
+    chunk: int = 0
+    content_hash: Optional[str] = None
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
 
     class Settings:
         name = "quizzes"
+        indexes = [IndexModel([("blog_id", 1), ("chunk", 1)])]
+
+class QuizBatchStatus(str, enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class QuizBatchRun(Document):
+    """Progress of one pass of the blog -> quiz pipeline; ``last_blog_id`` is the resume checkpoint."""
+    status: QuizBatchStatus = QuizBatchStatus.RUNNING
+    force: bool = False
+    last_blog_id: Optional[PydanticObjectId] = None
+    blogs_processed: int = 0
+    blogs_skipped: int = 0
+    blogs_failed: int = 0
+    quizzes_written: int = 0
+    errors: List[Dict[str, Any]] = Field(default_factory=list)
+    error: Optional[str] = None
+    started_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+    finished_at: Optional[datetime.datetime] = None
+
+    class Settings:
+        name = "quiz_batch_runs"
+        indexes = [IndexModel([("status", 1), ("started_at", DESCENDING)])]
+
+class PromptCacheEntry(Document):
+    """Completed LLM output keyed by a hash of (model, system prompt, prompt, response format)."""
+    key: str = Indexed(str, unique=True)
+    model: str
+    content: str
+    total_tokens: int = 0
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+
+    class Settings:
+        name = "prompt_cache"
+        indexes = [
+            IndexModel([("created_at", 1)], expireAfterSeconds=settings.PROMPT_CACHE_TTL_SECONDS),
+        ]
+
+class VideoJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    SUBMITTED = "submitted"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class VideoJob(Document):
+    """A fal.ai video generation request tracked by the background job workers."""
+    prompt: str
+    status: VideoJobStatus = VideoJobStatus.QUEUED
+    fal_request_id: Optional[str] = None
+    status_url: Optional[str] = None
+    response_url: Optional[str] = None
+    queue_position: Optional[int] = None
+    video_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+    submitted_at: Optional[datetime.datetime] = None
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+
+    class Settings:
+        name = "video_jobs"
+        indexes = [IndexModel([("status", 1)])]
 
 class ChatHistory(Document):
     user_id: Optional[str] = None
+    kind: str = "assistant"  # "tutor" or "assistant"
+    # Recent turns kept verbatim; older ones are folded into ``summary``
     messages: List[Dict[str, Any]] = Field(default_factory=list)
+    summary: str = ""
+    summarized_messages: int = 0
+    # Bumped on every write so compaction can detect a concurrent turn
+    version: int = 0
+    # sha256 of the secret half of the client's conversation token
+    secret_hash: str = ""
     timestamp: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
 
     class Settings:
         name = "chat_history"
+        indexes = [
+            IndexModel([("updated_at", 1)], expireAfterSeconds=settings.CHAT_HISTORY_TTL_SECONDS),
+        ]
 
 class UserDashboard(Document):
     user_id: str = Indexed(str, unique=True)
@@ -78,14 +181,34 @@ class ContactMessage(Document):
         name = "contact_messages"
 
 class OTPRecord(Document):
-    """Temporary OTP storage — auto-deleted after 10 minutes via backend cleanup."""
-    email: str = Indexed(str)
+    """Live OTP for an (email, purpose); MongoDB's TTL monitor deletes it once expires_at passes."""
+    email: str
     otp: str
     purpose: str = "register"  # "register" or "login"
+    attempts: int = 0
+    # Send times inside the rate-limit window, and whether the latest send was refused
+    sends: List[datetime.datetime] = Field(default_factory=list)
+    throttled: bool = False
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
     expires_at: datetime.datetime = Field(
-        default_factory=lambda: datetime.datetime.utcnow() + datetime.timedelta(minutes=10)
+        default_factory=lambda: datetime.datetime.utcnow() + datetime.timedelta(seconds=settings.OTP_TTL_SECONDS)
     )
 
     class Settings:
         name = "otp_records"
+        indexes = [
+            IndexModel([("email", 1), ("purpose", 1)], unique=True),
+            IndexModel([("expires_at", 1)], expireAfterSeconds=0),
+        ]
+
+class MailDeadLetter(Document):
+    """Outbound email that failed permanently or ran out of retries, kept for inspection or a manual resend."""
+    to_email: str
+    subject: str
+    html_body: str
+    attempts: int
+    error: str
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+
+    class Settings:
+        name = "mail_dead_letters"
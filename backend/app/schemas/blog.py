@@ -14,6 +14,11 @@ class BlogBase(BaseModel):
 class BlogCreate(BlogBase):
     slug: str
 
+class BlogImport(BlogCreate):
+    """One NDJSON line of a blog export/import."""
+    is_published: bool = False
+    created_at: Optional[datetime] = None
+
 class BlogUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
@@ -28,6 +33,8 @@ class BlogOut(BlogBase):
     slug: str
     is_published: bool
     created_at: datetime
+    word_count: Optional[int] = None
+    reading_time: Optional[int] = None
     
     @field_validator("id", mode="before")
     def convert_objectid_to_str(cls, v):
@@ -37,10 +44,89 @@ class BlogOut(BlogBase):
         populate_by_name = True
         from_attributes = True
 
+class BlogSummary(BaseModel):
+    """Listing projection — everything a card needs, without the Markdown body."""
+    id: str = Field(None, alias="_id")
+    title: str
+    slug: str
+    category: Optional[str] = None
+    tags: Optional[List[str]] = []
+    seo_description: Optional[str] = None
+    created_at: datetime
+    reading_time: Optional[int] = None
+
+    @field_validator("id", mode="before")
+    def convert_objectid_to_str(cls, v):
+        return str(v) if v else None
+
+    class Config:
+        populate_by_name = True
+        from_attributes = True
+
+class TocEntry(BaseModel):
+    level: int
+    id: str
+    title: str
+
+class BlogHTMLOut(BaseModel):
+    """Pre-rendered variant of BlogOut served by get_blog(format=html)."""
+    id: str = Field(None, alias="_id")
+    title: str
+    slug: str
+    category: Optional[str] = None
+    tags: Optional[List[str]] = []
+    seo_title: Optional[str] = None
+    seo_description: Optional[str] = None
+    is_published: bool
+    created_at: datetime
+    content_html: str
+    toc: List[TocEntry] = []
+    word_count: int = 0
+    reading_time: int = 0
+
+    @field_validator("id", mode="before")
+    def convert_objectid_to_str(cls, v):
+        return str(v) if v else None
+
+    class Config:
+        populate_by_name = True
+        from_attributes = True
+
+class PopularBlog(BlogSummary):
+    views: int = 0
+
+class BlogPage(BaseModel):
+    items: List[Any] = []
+    next_cursor: Optional[str] = None
+
+class SearchHit(BaseModel):
+    id: str
+    slug: str
+    title: str
+    category: Optional[str] = None
+    score: float
+    snippet: str
+
+class RelatedBlog(BaseModel):
+    id: str
+    slug: str
+    title: str
+    category: Optional[str] = None
+    score: float
+
+class FacetCount(BaseModel):
+    name: str
+    count: int
+
+class BlogFacetsOut(BaseModel):
+    categories: List[FacetCount] = []
+    tags: List[FacetCount] = []
+
 class BlogGenerate(BaseModel):
     topic: str
     difficulty: str
     word_count: int
     include_code: bool
     include_diagrams: bool = False
+    force_refresh: bool = False  # bypass the prompt-result cache
 
@@ -0,0 +1,259 @@
+"""
+Latency benchmark for the /ai/* routes.
+
+    python ai_stub_server.py &                       # fake upstreams, see its docstring
+    AI_USER_RATE_PER_MINUTE=100000 AI_USER_BURST=100000 uvicorn app.main:app &
+    python bench_ai.py --concurrency 1,8,32 --requests 200 --json bench.json
+    python bench_ai.py --baseline bench.json         # exit 1 if p95 or error rate regressed
+
+Raise the per-user admission limits as above, or most requests will be 429s
+(every benchmark request comes from one IP). Per route and concurrency level it
+reports p50/p95/p99 latency, time-to-first-token for streams, throughput and
+errors by status. Prompts vary per request so caches stay cold; --warm repeats
+one prompt to measure the cached path instead.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+DEFAULT_ROUTES = [
+    "tutor", "tutor-stream", "assistant", "assistant-stream", "generate-blog",
+    "generate-quiz", "generate-image", "generate-video", "images", "stats",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)]
+
+
+class Outcome:
+    __slots__ = ("status", "ttft", "error")
+
+    def __init__(self, status: int, ttft: Optional[float] = None, error: Optional[str] = None):
+        self.status = status
+        self.ttft = ttft
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+
+def _check(res: httpx.Response) -> Outcome:
+    return Outcome(res.status_code, error=None if res.is_success else f"HTTP {res.status_code}")
+
+
+async def _stream(client: httpx.AsyncClient, path: str, body: dict) -> Outcome:
+    started = time.perf_counter()
+    ttft = None
+    async with client.stream("POST", path, json=body) as res:
+        if not res.is_success:
+            await res.aread()
+            return _check(res)
+        async for line in res.aiter_lines():
+            if line.startswith("event: token") and ttft is None:
+                ttft = time.perf_counter() - started
+            elif line.startswith("event: error"):
+                return Outcome(res.status_code, ttft, "stream error event")
+    return Outcome(res.status_code, ttft)
+
+
+def _tiny_png() -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (1600, 1200), (40, 90, 160)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def build_scenarios(warm: bool) -> Dict[str, Callable]:
+    png = _tiny_png()
+
+    def n(i: int) -> int:
+        return 0 if warm else i
+
+    async def tutor(c, i):
+        return _check(await c.post("/ai/tutor", json={"message": f"Explain gradient descent, variant {n(i)}"}))
+
+    async def tutor_stream(c, i):
+        return await _stream(c, "/ai/tutor/stream", {"message": f"Explain backpropagation, variant {n(i)}"})
+
+    async def assistant(c, i):
+        return _check(await c.post("/ai/assistant", json={"message": f"What is a transformer? ({n(i)})"}))
+
+    async def assistant_stream(c, i):
+        return await _stream(c, "/ai/assistant/stream", {"message": f"What is attention? ({n(i)})"})
+
+    async def generate_blog(c, i):
+        return _check(await c.post("/ai/generate-blog", json={
+            "topic": f"Vector databases part {n(i)}", "difficulty": "beginner",
+            "word_count": 600, "include_code": True,
+        }))
+
+    async def generate_quiz(c, i):
+        return _check(await c.post("/ai/generate-quiz", json={"content": f"Gradient descent minimises a loss. Sample {n(i)}."}))
+
+    async def generate_image(c, i):
+        return _check(await c.post("/ai/generate-image", json={"prompt": f"A robot reading a book, scene {n(i)}"}))
+
+    async def generate_video(c, i):
+        # Submission and one status poll; the job itself completes in the background
+        res = await c.post("/ai/generate-video", json={"prompt": f"Timelapse of a city, take {i}"})
+        if not res.is_success:
+            return _check(res)
+        return _check(await c.get(f"/ai/jobs/{res.json()['job_id']}"))
+
+    async def images(c, i):
+        return _check(await c.post("/ai/images", files={"file": ("bench.png", png, "image/png")}))
+
+    async def stats(c, i):
+        res = await c.get("/ai/cache/stats")
+        if not res.is_success:
+            return _check(res)
+        return _check(await c.get("/ai/admission/stats"))
+
+    return {
+        "tutor": tutor, "tutor-stream": tutor_stream, "assistant": assistant,
+        "assistant-stream": assistant_stream, "generate-blog": generate_blog,
+        "generate-quiz": generate_quiz, "generate-image": generate_image,
+        "generate-video": generate_video, "images": images, "stats": stats,
+    }
+
+
+async def run_level(client: httpx.AsyncClient, scenario: Callable, concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                outcome = await scenario(client, i)
+            except Exception as e:
+                outcome = Outcome(0, error=type(e).__name__)
+            latencies.append(time.perf_counter() - started)
+            # Transport failures have no status; count them by exception name instead
+            statuses[outcome.status or outcome.error] += 1
+            if outcome.ttft is not None:
+                ttfts.append(outcome.ttft)
+            if not outcome.ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ms = [x * 1000 for x in latencies]
+    result = {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ms, 50), 1),
+        "p95_ms": round(percentile(ms, 95), 1),
+        "p99_ms": round(percentile(ms, 99), 1),
+        "status_counts": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+    if ttfts:
+        ttft_ms = [x * 1000 for x in ttfts]
+        result["ttft_p50_ms"] = round(percentile(ttft_ms, 50), 1)
+        result["ttft_p95_ms"] = round(percentile(ttft_ms, 95), 1)
+    return result
+
+
+def print_table(results: Dict[str, List[dict]]) -> None:
+    header = f"{'route':<18}{'conc':>5}{'reqs':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'err%':>7}  statuses"
+    print(header)
+    print("-" * len(header))
+    for route, levels in results.items():
+        for r in levels:
+            ttft = f"{r['ttft_p50_ms']:.0f}" if "ttft_p50_ms" in r else "-"
+            statuses = " ".join(f"{k}:{v}" for k, v in r["status_counts"].items())
+            print(f"{route:<18}{r['concurrency']:>5}{r['requests']:>6}{r['throughput_rps']:>9.1f}"
+                  f"{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}{r['p99_ms']:>9.0f}{ttft:>9}"
+                  f"{r['error_rate'] * 100:>6.1f}%  {statuses}")
+
+
+def compare(results: Dict[str, List[dict]], baseline: Dict[str, List[dict]], tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Regressions: p95 more than ``tolerance`` (and ``min_delta_ms``) slower, or error
+    rate up by over a point. The absolute floor keeps sub-millisecond noise out.
+    """
+    regressions = []
+    for route, levels in results.items():
+        previous = {r["concurrency"]: r for r in baseline.get(route, [])}
+        for r in levels:
+            old = previous.get(r["concurrency"])
+            if old is None:
+                continue
+            slower = r["p95_ms"] - old["p95_ms"]
+            if slower > min_delta_ms and r["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{route} @{r['concurrency']}: p95 {old['p95_ms']}ms -> {r['p95_ms']}ms")
+            if r["error_rate"] > old["error_rate"] + 0.01:
+                regressions.append(f"{route} @{r['concurrency']}: error rate {old['error_rate']:.2%} -> {r['error_rate']:.2%}")
+    return regressions
+
+
+async def main(args) -> int:
+    scenarios = build_scenarios(args.warm)
+    routes = args.routes.split(",") if args.routes else DEFAULT_ROUTES
+    unknown = [r for r in routes if r not in scenarios]
+    if unknown:
+        print(f"Unknown routes: {', '.join(unknown)}. Choose from: {', '.join(scenarios)}")
+        return 2
+    levels = [int(c) for c in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels))
+    results: Dict[str, List[dict]] = {}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for route in routes:
+            results[route] = []
+            for concurrency in levels:
+                results[route].append(await run_level(client, scenarios[route], concurrency, args.requests))
+                print(f"  {route} @{concurrency} done", file=sys.stderr)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the /ai/* routes.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--routes", default="", help=f"comma-separated subset of: {','.join(DEFAULT_ROUTES)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per route and level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--warm", action="store_true", help="repeat one prompt per route to hit the caches")
+    parser.add_argument("--json", default="", help="write results to this file")
+    parser.add_argument("--baseline", default="", help="compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95 slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p95 slowdowns smaller than this")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,140 @@
+"""
+Event-loop latency under a login storm.
+
+    python bench_auth.py in-process --logins 64
+    python bench_auth.py http --base-url http://127.0.0.1:8000 --email a@b.c --password secret --logins 200
+
+``in-process`` needs no server or database. It runs N bcrypt verifications at
+BCRYPT_ROUNDS, first inline (the old behaviour) and then through the hashing
+pool. Meanwhile a 10 ms ticker measures how late the event loop wakes it up.
+
+``http`` fires N concurrent POST /auth/login requests at a running API. It
+probes an unrelated route (GET / by default) every 10 ms, before and during the
+storm, and reports how the probe latency degrades. Pass --register to create
+the account first.
+"""
+import argparse
+import asyncio
+import math
+import statistics
+import sys
+import time
+from typing import List
+
+PROBE_INTERVAL = 0.01
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)]
+
+
+def summary(label: str, samples_ms: List[float]) -> str:
+    if not samples_ms:
+        return f"{label:<28} no samples"
+    return (f"{label:<28} n={len(samples_ms):<5} p50={percentile(samples_ms, 50):7.1f}ms "
+            f"p95={percentile(samples_ms, 95):7.1f}ms p99={percentile(samples_ms, 99):7.1f}ms "
+            f"max={max(samples_ms):7.1f}ms")
+
+
+async def _ticker(stop: asyncio.Event, lags: List[float]) -> None:
+    """Sleep PROBE_INTERVAL repeatedly and record how late each wake-up was."""
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def in_process(args) -> None:
+    sys.path.insert(0, ".")
+    from app.core.config import settings
+    from app.core.security import get_password_hash, verify_password, verify_password_async
+
+    hashed = get_password_hash("correct horse battery staple")
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS}, logins={args.logins}\n")
+
+    async def inline_login():
+        verify_password("correct horse battery staple", hashed)
+
+    async def pooled_login():
+        await verify_password_async("correct horse battery staple", hashed)
+
+    for label, login in (("inline (blocking)", inline_login), ("hash pool", pooled_login)):
+        lags: List[float] = []
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_ticker(stop, lags))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticker
+        print(summary(f"{label} loop lag", lags))
+        print(f"{'':<28} {args.logins / elapsed:.1f} logins/s\n")
+
+
+async def http(args) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120.0,
+                                 limits=httpx.Limits(max_connections=args.logins + 10)) as client:
+        if args.register:
+            await client.post("/auth/register", json={"name": "Bench", "email": args.email, "password": args.password})
+
+        async def probe(stop: asyncio.Event, samples: List[float]):
+            while not stop.is_set():
+                started = time.perf_counter()
+                await client.get(args.probe)
+                samples.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(PROBE_INTERVAL)
+
+        idle: List[float] = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(stop, idle))
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        await task
+
+        statuses: List[int] = []
+        login_ms: List[float] = []
+
+        async def login():
+            started = time.perf_counter()
+            res = await client.post("/auth/login", data={"username": args.email, "password": args.password})
+            login_ms.append((time.perf_counter() - started) * 1000)
+            statuses.append(res.status_code)
+
+        storm: List[float] = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(stop, storm))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await task
+
+    print(summary(f"{args.probe} idle", idle))
+    print(summary(f"{args.probe} during storm", storm))
+    print(summary("login", login_ms))
+    ok = sum(1 for s in statuses if s == 200)
+    print(f"\n{args.logins} logins in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s), {ok} ok")
+    if idle and storm:
+        print(f"probe p95 slowdown: x{percentile(storm, 95) / max(statistics.median(idle), 0.1):.1f} of idle median")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure event-loop latency during a login storm.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    p_local = sub.add_parser("in-process", help="inline bcrypt vs the hashing pool, no server needed")
+    p_local.add_argument("--logins", type=int, default=32)
+    p_http = sub.add_parser("http", help="login storm against a running API")
+    p_http.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p_http.add_argument("--email", required=True)
+    p_http.add_argument("--password", required=True)
+    p_http.add_argument("--register", action="store_true", help="create the account before the storm")
+    p_http.add_argument("--logins", type=int, default=100)
+    p_http.add_argument("--probe", default="/", help="unrelated route to probe")
+    p_http.add_argument("--idle-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(in_process(args) if args.mode == "in-process" else http(args))
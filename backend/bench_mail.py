@@ -0,0 +1,141 @@
+"""
+Exercise the outbound mail queue against a local aiosmtpd stand-in.
+
+    pip install -r requirements-dev.txt
+    python bench_mail.py --emails 200 --fail-rate 0.1
+
+Starts an in-process aiosmtpd server, points the SMTP settings at it and sends
+--emails OTP messages twice: first one connection per message on a thread (the
+old behaviour), then through the mailer. For each it reports how long the
+caller waited, total time until the server had everything, and how many SMTP
+connections were opened.
+
+--fail-rate answers that fraction of messages with a 451 so the retry path
+runs. Recipients at @reject.invalid get a 550 and are dead-lettered; without a
+database the dead-letter insert fails and is only logged.
+
+To watch the real API deliver to the stand-in instead:
+
+    python -m aiosmtpd -n -l 127.0.0.1:1025
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=false uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+from aiosmtpd.controller import Controller
+
+
+class Handler:
+    def __init__(self, fail_rate: float):
+        self.fail_rate = fail_rate
+        self.delivered = 0
+        self.sessions = 0
+        self.done = threading.Event()
+        self.expected = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith("@reject.invalid"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if random.random() < self.fail_rate:
+            return "451 Try again later"
+        self.delivered += 1
+        if self.delivered >= self.expected:
+            self.done.set()
+        return "250 Message accepted"
+
+    def reset(self, expected: int) -> None:
+        self.delivered = 0
+        self.sessions = 0
+        self.expected = expected
+        self.done.clear()
+
+
+def report(label: str, waited: float, total: float, handler: Handler, emails: int) -> None:
+    print(f"{label:<24} caller waited {waited * 1000:8.1f}ms  all delivered {total:6.2f}s  "
+          f"delivered={handler.delivered}/{emails}  smtp sessions={handler.sessions}")
+
+
+async def main(args) -> None:
+    handler = Handler(args.fail_rate)
+    controller = Controller(handler, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    os.environ.update({
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(args.port),
+        "SMTP_STARTTLS": "false",
+        "SMTP_USER": "",
+        "MAIL_WORKERS": str(args.workers),
+        "MAIL_RETRY_BASE_SECONDS": "0.05",
+        "MAIL_QUEUE_MAX": str(max(args.emails * 2, 1000)),
+    })
+    sys.path.insert(0, ".")
+    import smtplib
+    from email.mime.text import MIMEText
+    from app.core.email import render_otp_email, send_otp_email, OTP_SUBJECT
+    from app.core.mailer import mailer
+
+    recipients = [f"user{i}@example.com" for i in range(args.emails)]
+    try:
+        # Old behaviour: a fresh connection per email, awaited by the request
+        handler.reset(args.emails)
+
+        def send_direct(to_email: str) -> None:
+            message = MIMEText(render_otp_email("123456"), "html")
+            message["Subject"] = OTP_SUBJECT
+            with smtplib.SMTP("127.0.0.1", args.port) as server:
+                server.ehlo()
+                server.sendmail("noreply@aiera.academy", to_email, message.as_string())
+
+        async def direct(to_email: str) -> None:
+            try:
+                await asyncio.to_thread(send_direct, to_email)
+            except smtplib.SMTPException:
+                pass
+
+        started = time.perf_counter()
+        await asyncio.gather(*(direct(r) for r in recipients))
+        elapsed = time.perf_counter() - started
+        report("per-message connection", elapsed, elapsed, handler, args.emails)
+
+        # Mailer: enqueue and return, delivery on pooled sessions
+        handler.reset(args.emails)
+        mailer.start(args.workers)
+        started = time.perf_counter()
+        for r in recipients:
+            await send_otp_email(r, "123456")
+        waited = time.perf_counter() - started
+        await asyncio.to_thread(handler.done.wait, 60)
+        total = time.perf_counter() - started
+        report("mail queue", waited, total, handler, args.emails)
+
+        if args.rejects:
+            for i in range(args.rejects):
+                await send_otp_email(f"nobody{i}@reject.invalid", "123456")
+        await mailer.stop()
+        print(f"\nmailer stats: {mailer.stats()}")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send OTP emails to a local aiosmtpd server.")
+    parser.add_argument("--emails", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of messages answered with 451")
+    parser.add_argument("--rejects", type=int, default=2, help="messages to @reject.invalid, which are dead-lettered")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,52 @@
+"""
+Stream blogs to/from NDJSON.
+
+    python blog_ndjson.py export blogs.ndjson
+    python blog_ndjson.py import blogs.ndjson
+
+Imports upsert by slug. A running API server rebuilds its in-memory blog indexes
+only on restart or via POST /blogs/import, so prefer the endpoint for live servers.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from app.db.session import init_db
+from app.models.base_models import Blog
+from app.core.blog_io import export_ndjson, import_ndjson
+
+CHUNK_SIZE = 64 * 1024
+
+async def _read_chunks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+async def export_blogs(path: str):
+    await init_db([Blog])
+    count = 0
+    with open(path, "wb") as f:
+        async for line in export_ndjson():
+            f.write(line)
+            count += 1
+    print(f"Exported {count} blogs to {path}")
+
+async def import_blogs(path: str):
+    await init_db([Blog])
+    report = await import_ndjson(_read_chunks(path))
+    print(json.dumps(report, indent=2, default=str))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import blogs as NDJSON.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+    if args.command == "export":
+        asyncio.run(export_blogs(args.path))
+    else:
+        report = asyncio.run(import_blogs(args.path))
+        sys.exit(1 if report["error_count"] else 0)
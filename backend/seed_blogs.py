@@ -1,10 +1,16 @@
 import asyncio
+import json
 from app.db.session import init_db
-from app.models.base_models import Blog, User, Course, Quiz, ChatHistory
+from app.models.base_models import Blog
+from app.core.blog_io import import_ndjson
+
+async def _as_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
 
 async def seed_blogs():
     # Initialize Beanie
-    await init_db([User, Blog, Course, Quiz, ChatHistory])
+    await init_db([Blog])
     
     blogs = [
         {
@@ -90,13 +96,9 @@ async def seed_blogs():
         }
     ]
 
-    for blog_data in blogs:
-        existing = await Blog.find_one(Blog.slug == blog_data["slug"])
-        if not existing:
-            blog = Blog(**blog_data, is_published=True)
-            await blog.insert()
-    
-    print("Blogs seeded successfully to MongoDB!")
+    # Same batched upsert-by-slug path as the NDJSON importer; existing slugs are kept
+    report = await import_ndjson(_as_ndjson({**b, "is_published": True} for b in blogs), overwrite=False)
+    print(f"Blogs seeded successfully to MongoDB! ({report['inserted']} inserted, {report['updated']} updated)")
 
 if __name__ == "__main__":
     asyncio.run(seed_blogs())
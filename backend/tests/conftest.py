@@ -0,0 +1,46 @@
+import httpx
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+import ai_stub_server
+from app.core import http
+from app.core.config import settings
+from app.models.base_models import VideoJob
+
+STUB_URL = "http://fal-stub"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """Beanie over an in-memory mongomock database, fresh for every test."""
+    await init_beanie(database=AsyncMongoMockClient()["test"], document_models=[VideoJob])
+
+
+@pytest.fixture
+async def fal_stub(monkeypatch):
+    """
+    Route outbound HTTP to the fal.ai queue imitation in ai_stub_server.py, in
+    process, with fast jobs and polling. Yields the stub's config dict so tests
+    can change job duration or failure rate.
+    """
+    monkeypatch.setattr(settings, "FAL_QUEUE_URL", f"{STUB_URL}/fal/fal-ai/minimax-video")
+    monkeypatch.setattr(settings, "FAL_API_KEY", "stub")
+    monkeypatch.setattr(settings, "VIDEO_POLL_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "VIDEO_JOB_TIMEOUT_SECONDS", 30)
+    monkeypatch.setitem(ai_stub_server.config, "latency_ms", 0.0)
+    monkeypatch.setitem(ai_stub_server.config, "jitter_ms", 0.0)
+    monkeypatch.setitem(ai_stub_server.config, "error_rate", 0.0)
+    monkeypatch.setitem(ai_stub_server.config, "rate_limit_rate", 0.0)
+    monkeypatch.setitem(ai_stub_server.config, "video_seconds", 0.05)
+    monkeypatch.setitem(ai_stub_server.config, "video_fail_rate", 0.0)
+    ai_stub_server._video_jobs.clear()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=ai_stub_server.app), base_url=STUB_URL)
+    monkeypatch.setattr(http, "_client", client)
+    yield ai_stub_server.config
+    await client.aclose()
@@ -0,0 +1,32 @@
+import pytest
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.net import client_ip
+
+
+def make_request(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+@pytest.fixture
+def behind_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8, 127.0.0.1")
+
+
+def test_header_ignored_without_trusted_proxies():
+    assert client_ip(make_request("10.1.2.3", "203.0.113.9")) == "10.1.2.3"
+
+
+def test_header_ignored_from_untrusted_peer(behind_proxy):
+    assert client_ip(make_request("198.51.100.7", "203.0.113.9")) == "198.51.100.7"
+
+
+def test_rightmost_untrusted_hop_wins(behind_proxy):
+    # The client prepended a fake address; the proxy appended the real one
+    assert client_ip(make_request("10.1.2.3", "1.2.3.4, 203.0.113.9, 10.9.9.9")) == "203.0.113.9"
+
+
+def test_trusted_peer_without_header(behind_proxy):
+    assert client_ip(make_request("127.0.0.1")) == "127.0.0.1"
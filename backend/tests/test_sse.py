@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.api.ai import _sse_response
+from app.core.admission import admission
+
+pytestmark = pytest.mark.anyio
+
+# uvicorn reports 2.3, which makes Starlette race the body against a disconnect listener
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0", "spec_version": "2.3"},
+    "method": "POST",
+    "path": "/ai/tutor/stream",
+    "headers": [],
+    "client": ("203.0.113.9", 1234),
+    "query_string": b"",
+}
+
+
+async def slow_tokens():
+    await asyncio.sleep(1)
+    yield "never sent"
+
+
+async def disconnected():
+    return {"type": "http.disconnect"}
+
+
+async def test_slot_released_when_client_leaves_before_first_chunk():
+    async def send(message):
+        # Give the disconnect listener time to cancel before the body starts
+        await asyncio.sleep(0.05)
+
+    before = admission.in_flight
+    response = await _sse_response(Request(SCOPE, disconnected), slow_tokens())
+    assert admission.in_flight == before + 1
+    await response(SCOPE, disconnected, send)
+    assert admission.in_flight == before
+
+
+async def test_slot_released_once_after_full_stream():
+    async def tokens():
+        yield "a"
+        yield "b"
+
+    async def connected():
+        await asyncio.sleep(10)
+        return {"type": "http.disconnect"}
+
+    chunks = []
+
+    async def send(message):
+        chunks.append(message.get("body", b""))
+
+    before = admission.in_flight
+    response = await _sse_response(Request(SCOPE, connected), tokens())
+    await response(SCOPE, connected, send)
+    assert admission.in_flight == before
+    assert b"event: done" in b"".join(chunks)
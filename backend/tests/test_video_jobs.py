@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+import ai_stub_server
+from app.core.ai_service import AIService
+from app.core.config import settings
+from app.core.jobs import VideoJobRunner
+from app.models.base_models import VideoJob, VideoJobStatus
+
+pytestmark = pytest.mark.anyio
+
+TERMINAL = (VideoJobStatus.COMPLETED, VideoJobStatus.FAILED)
+
+
+async def wait_for_terminal(job_id, timeout: float = 5.0) -> VideoJob:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await VideoJob.get(job_id)
+        if job.status in TERMINAL:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job.status} after {timeout}s")
+
+
+@pytest.fixture
+async def runner(db, fal_stub):
+    runner = VideoJobRunner()
+    yield runner
+    await runner.stop()
+
+
+async def test_submit_polls_until_completed(runner):
+    await runner.start(1)
+    job = await runner.submit("A robot reading a book")
+    assert job.status == VideoJobStatus.QUEUED
+
+    job = await wait_for_terminal(job.id)
+    assert job.status == VideoJobStatus.COMPLETED
+    assert job.fal_request_id in ai_stub_server._video_jobs
+    assert job.video_url == f"https://stub.invalid/videos/{job.fal_request_id}.mp4"
+    assert job.submitted_at is not None
+    assert job.error is None
+
+
+async def test_failed_upstream_job_is_marked_failed(runner, fal_stub):
+    fal_stub["video_fail_rate"] = 1.0
+    await runner.start(1)
+    job = await runner.submit("This one fails")
+
+    job = await wait_for_terminal(job.id)
+    assert job.status == VideoJobStatus.FAILED
+    assert "FAILED" in job.error
+    assert job.video_url is None
+
+
+async def test_job_past_deadline_times_out(runner, fal_stub, monkeypatch):
+    fal_stub["video_seconds"] = 60.0
+    monkeypatch.setattr(settings, "VIDEO_JOB_TIMEOUT_SECONDS", 0)
+    await runner.start(1)
+    job = await runner.submit("Never finishes")
+
+    job = await wait_for_terminal(job.id)
+    assert job.status == VideoJobStatus.FAILED
+    assert "timed out" in job.error
+
+
+async def test_failed_submission_is_marked_failed(runner, fal_stub):
+    fal_stub["error_rate"] = 1.0
+    await runner.start(1)
+    job = await runner.submit("Upstream is down")
+
+    job = await wait_for_terminal(job.id)
+    assert job.status == VideoJobStatus.FAILED
+    assert job.fal_request_id is None
+    assert "500" in job.error
+
+
+async def test_restart_resumes_submitted_job_without_resubmitting(runner):
+    # A job the previous process had already handed to fal.ai
+    first = VideoJobRunner()
+    submitted = await first.submit("Submitted before the restart")
+    fal = await AIService.submit_video(submitted.prompt)
+    submitted.status = VideoJobStatus.IN_PROGRESS
+    submitted.fal_request_id = fal["request_id"]
+    submitted.status_url = fal["status_url"]
+    submitted.response_url = fal["response_url"]
+    await submitted.save()
+    # And one that never reached fal.ai
+    queued = await first.submit("Queued before the restart")
+    assert len(ai_stub_server._video_jobs) == 1
+
+    await runner.start(1)
+    submitted = await wait_for_terminal(submitted.id)
+    queued = await wait_for_terminal(queued.id)
+
+    assert submitted.status == VideoJobStatus.COMPLETED
+    assert submitted.fal_request_id == fal["request_id"]
+    assert queued.status == VideoJobStatus.COMPLETED
+    # Only the queued job was submitted; the in-flight one resumed polling
+    assert len(ai_stub_server._video_jobs) == 2
+
+
+async def test_restart_leaves_finished_jobs_alone(runner):
+    done = VideoJob(prompt="Already done", status=VideoJobStatus.COMPLETED, video_url="https://example.invalid/v.mp4")
+    await done.insert()
+
+    await runner.start(1)
+    await asyncio.sleep(0.05)
+
+    assert runner.queue.empty()
+    assert (await VideoJob.get(done.id)).status == VideoJobStatus.COMPLETED
+    assert ai_stub_server._video_jobs == {}
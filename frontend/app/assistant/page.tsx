@@ -14,6 +14,7 @@ export default function UserAIAssistant() {
     const [messages, setMessages] = useState([
         { role: "assistant", content: "Hello! I'm your AI Academy Assistant. How can I help you on your AI learning journey today?" }
     ])
+    const [conversationId, setConversationId] = useState<string | null>(null)
     const [input, setInput] = useState("")
     const [isLoading, setIsLoading] = useState(false)
     const scrollRef = useRef<HTMLDivElement>(null)
@@ -43,10 +44,18 @@ export default function UserAIAssistant() {
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify({
                     message: input,
-                    history: messages.slice(-5) // Send last 5 messages for context
+                    conversation_id: conversationId // history is kept server-side
                 })
             })
+            if (response.status === 404 && conversationId) {
+                // Expired or deleted server-side; the next message starts a new conversation
+                setConversationId(null)
+                setMessages(prev => [...prev, { role: "assistant", content: "This conversation has expired. Send your message again to start a new one." }])
+                return
+            }
+            if (!response.ok) throw new Error(`Assistant request failed: ${response.status}`)
             const data = await response.json()
+            if (data.conversation_id) setConversationId(data.conversation_id)
             setMessages(prev => [...prev, { role: "assistant", content: data.response }])
         } catch (error) {
             setMessages(prev => [...prev, { role: "assistant", content: "Sorry, I'm having trouble connecting to my neural core right now. Please try again later." }])
@@ -6,7 +6,7 @@ import { User, Mail, Calendar, BookOpen, Trophy, MessageSquare, Star, Edit2 } fr
 import Link from "next/link"
 import { useEffect, useState } from "react"
 import { useRouter } from "next/navigation"
-import { API_URL } from "@/lib/api"
+import { API_URL, avatarUrl } from "@/lib/api"
 
 export default function ProfilePage() {
     const [user, setUser] = useState<{ name: string; email: string; profile_picture?: string } | null>(null)
@@ -43,7 +43,7 @@ export default function ProfilePage() {
                         <div className="flex items-start gap-6">
                             <div className="w-20 h-20 rounded-2xl overflow-hidden ai-gradient flex items-center justify-center text-white font-black text-3xl shadow-lg shadow-primary/20 uppercase">
                                 {user?.profile_picture ? (
-                                    <img src={`${API_URL}${user.profile_picture}`} alt="Profile" className="w-full h-full object-cover" />
+                                    <img src={avatarUrl(user.profile_picture, 80)} alt="Profile" className="w-full h-full object-cover" />
                                 ) : (
                                     user ? user.name.charAt(0) : '-'
                                 )}
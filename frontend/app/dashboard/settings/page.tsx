@@ -5,7 +5,7 @@ import { motion } from "framer-motion"
 import { User, Mail, Lock, Bell, Palette, Save, Shield, Camera } from "lucide-react"
 import { useState, useEffect, useRef } from "react"
 import { useRouter } from "next/navigation"
-import { API_URL } from "@/lib/api"
+import { API_URL, avatarUrl } from "@/lib/api"
 
 export default function SettingsPage() {
     const [name, setName] = useState("")
@@ -140,7 +140,7 @@ export default function SettingsPage() {
                             <div className="relative group cursor-pointer" onClick={() => fileInputRef.current?.click()}>
                                 <div className="w-24 h-24 rounded-2xl overflow-hidden ai-gradient flex items-center justify-center text-white font-black text-4xl shadow-lg shadow-primary/20">
                                     {profilePicture ? (
-                                        <img src={`${API_URL}${profilePicture}`} alt="Profile" className="w-full h-full object-cover" />
+                                        <img src={avatarUrl(profilePicture, 96)} alt="Profile" className="w-full h-full object-cover" />
                                     ) : (
                                         name ? name.charAt(0).toUpperCase() : '-'
                                     )}
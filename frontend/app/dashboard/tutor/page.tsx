@@ -14,6 +14,7 @@ export default function AITutorChat() {
     const [messages, setMessages] = useState([
         { role: "assistant", content: "Hello! I'm your AI Era Tutor. How can I help you master AI today?" }
     ])
+    const [conversationId, setConversationId] = useState<string | null>(null)
     const [input, setInput] = useState("")
     const [isTyping, setIsTyping] = useState(false)
     const scrollRef = useRef<HTMLDivElement>(null)
@@ -43,10 +44,21 @@ export default function AITutorChat() {
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify({
                     message: userMessage,
-                    history: newMessages.slice(-6)
+                    conversation_id: conversationId // history is kept server-side
                 })
             })
+            if (response.status === 404 && conversationId) {
+                // Expired or deleted server-side; the next message starts a new conversation
+                setConversationId(null)
+                setMessages([...newMessages, {
+                    role: "assistant",
+                    content: "This conversation has expired. Send your message again to start a new one."
+                }])
+                return
+            }
+            if (!response.ok) throw new Error(`Tutor request failed: ${response.status}`)
             const data = await response.json()
+            if (data.conversation_id) setConversationId(data.conversation_id)
             setMessages([...newMessages, {
                 role: "assistant",
                 content: data.response
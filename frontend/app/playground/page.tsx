@@ -192,6 +192,7 @@ export default function AIPlayground() {
 
         // Handle file attachment
         let imageData: string | null = null;
+        let imageId: string | null = null;
         if (attachedFile) {
             if (attachedFile.type.startsWith("image/")) {
                 imageData = await new Promise<string>((resolve) => {
@@ -199,6 +200,15 @@ export default function AIPlayground() {
                     reader.onload = () => resolve(reader.result as string);
                     reader.readAsDataURL(attachedFile);
                 });
+                // Upload once; the server downscales it and chat requests carry only the id
+                try {
+                    const form = new FormData();
+                    form.append("file", attachedFile);
+                    const uploadRes = await fetch(`${API_URL}/ai/images`, { method: "POST", body: form });
+                    if (uploadRes.ok) imageId = (await uploadRes.json()).image_id;
+                } catch {
+                    imageId = null;
+                }
             } else {
                 try {
                     let fileContent = await attachedFile.text();
@@ -252,10 +262,23 @@ export default function AIPlayground() {
                     const errBody = await response.text().catch(() => "");
                     throw new Error(`Error: ${response.status} - ${errBody}`);
                 }
-                const data = await response.json();
+                // The API queues a background job; poll it until it settles
+                let job = await response.json();
+                while (job.status !== "completed" && job.status !== "failed") {
+                    await new Promise(resolve => setTimeout(resolve, 5000));
+                    const pollRes = await fetch(`${API_URL}/ai/jobs/${job.job_id}`, { signal: abortController.signal });
+                    if (!pollRes.ok) {
+                        const errBody = await pollRes.text().catch(() => "");
+                        throw new Error(`Error: ${pollRes.status} - ${errBody}`);
+                    }
+                    job = await pollRes.json();
+                }
+                if (job.status === "failed") {
+                    throw new Error(job.error || "Video generation failed");
+                }
                 setMessages(prev => {
                     const filtered = prev.filter(m => !m.content.includes("Generating video"));
-                    return [...filtered, { role: "ai", content: `**Video generated!**\n\nPrompt: *${currentInput}*`, videoUrl: data.url }];
+                    return [...filtered, { role: "ai", content: `**Video generated!**\n\nPrompt: *${currentInput}*`, videoUrl: job.url }];
                 });
             } else {
                 // Regular AI chat
@@ -270,7 +293,8 @@ export default function AIPlayground() {
                     system_prompt: systemPrompt,
                     model: selectedModel
                 };
-                if (imageData) requestBody.image_data = imageData;
+                if (imageId) requestBody.image_id = imageId;
+                else if (imageData) requestBody.image_data = imageData;
 
                 const response = await fetch(`${API_URL}/ai/assistant`, {
                     method: "POST",
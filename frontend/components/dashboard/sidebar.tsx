@@ -4,7 +4,7 @@ import { Home, MessageSquare, Heart, Clock, User, Settings as SettingsIcon, LogO
 import Link from "next/link"
 import { useState, useEffect } from "react"
 import { useTheme } from "next-themes"
-import { API_URL } from "@/lib/api"
+import { API_URL, avatarUrl } from "@/lib/api"
 
 export default function UserSidebar() {
     const [active, setActive] = useState("Dashboard")
@@ -54,7 +54,7 @@ export default function UserSidebar() {
                 <div className="flex items-center gap-3 px-2 py-3 mb-6 bg-background/50 rounded-xl border border-border">
                     <div className="w-10 h-10 rounded-full overflow-hidden bg-primary/20 flex items-center justify-center text-primary font-bold shadow-sm">
                         {user.profile_picture ? (
-                            <img src={`${API_URL}${user.profile_picture}`} alt="" className="w-full h-full object-cover" />
+                            <img src={avatarUrl(user.profile_picture, 40)} alt="" className="w-full h-full object-cover" />
                         ) : (
                             user.name.charAt(0).toUpperCase()
                         )}
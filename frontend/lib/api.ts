@@ -1,2 +1,15 @@
 // Shared API base URL - uses environment variable in production, falls back to localhost in dev
 export const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://127.0.0.1:8000"
+
+// Square thumbnail sizes the backend renders for uploaded avatars (AVATAR_SIZES)
+const AVATAR_SIZES = [64, 128, 256]
+
+// URL for a profile picture shown at `cssPixels`, using the smallest thumbnail that stays sharp on 2x screens
+export function avatarUrl(path: string, cssPixels: number): string {
+    if (/^https?:\/\//.test(path)) return path
+    const match = path.match(/^(\/uploads\/profiles\/[0-9a-f]{32})\.jpg$/)
+    if (!match) return `${API_URL}${path}`
+    const size = AVATAR_SIZES.find((s) => s >= cssPixels * 2)
+    const file = size ? `${match[1]}_${size}.jpg` : path
+    return `${API_URL}${file}`
+}